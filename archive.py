@@ -0,0 +1,267 @@
+import argparse
+import json
+import os
+import sqlite3
+import uuid
+import pandas as pd
+
+try:
+    import pyarrow as pa
+    import pyarrow.dataset as ds
+    import pyarrow.parquet as pq
+    from pyarrow import fs
+except ImportError:
+    pa = None
+
+ARCHIVE_DIR = "archive"
+STATE_FILE = "_state.json"
+
+# Fixed schemas so every incremental batch writes compatible files.
+if pa is not None:
+    SCHEMAS = {
+        "events": pa.schema([
+            ("id", pa.string()),
+            ("headline", pa.string()),
+            ("summary", pa.string()),
+            ("confidence", pa.int64()),
+            ("direction", pa.string()),
+            ("reason", pa.string()),
+            ("sentiment", pa.string()),
+            ("assets", pa.string()),
+            ("raw", pa.string()),
+            ("timestamp", pa.string()),
+            ("date", pa.string()),
+            ("event_type", pa.string()),
+        ]),
+        "classifications": pa.schema([
+            ("event_id", pa.string()),
+            ("asset", pa.string()),
+            ("direction", pa.string()),
+            ("confidence", pa.int64()),
+            ("sentiment", pa.string()),
+            ("timestamp", pa.string()),
+            ("date", pa.string()),
+            ("event_type", pa.string()),
+        ]),
+        "trades": pa.schema([
+            ("id", pa.string()),
+            ("headline", pa.string()),
+            ("symbol", pa.string()),
+            ("side", pa.string()),
+            ("qty", pa.float64()),
+            ("confidence", pa.int64()),
+            ("approved", pa.int64()),
+            ("timestamp", pa.string()),
+            ("date", pa.string()),
+        ]),
+        "fills": pa.schema([
+            ("id", pa.string()),
+            ("run_id", pa.string()),
+            ("symbol", pa.string()),
+            ("side", pa.string()),
+            ("qty", pa.float64()),
+            ("price", pa.float64()),
+            ("size_eur", pa.float64()),
+            ("event_ts", pa.int64()),
+            ("fill_ts", pa.int64()),
+            ("timestamp", pa.string()),
+            ("date", pa.string()),
+        ]),
+    }
+
+PARTITIONS = {
+    "events": ["date", "event_type"],
+    "classifications": ["date", "event_type"],
+    "trades": ["date"],
+    "fills": ["date"],
+}
+
+def require_pyarrow():
+    if pa is None:
+        raise RuntimeError("pyarrow is not installed")
+
+def load_state(root):
+    path = os.path.join(root, STATE_FILE)
+    if os.path.exists(path):
+        with open(path) as f:
+            return json.load(f)
+    return {}
+
+def save_state(root, state):
+    path = os.path.join(root, STATE_FILE)
+    with open(path + ".tmp", "w") as f:
+        json.dump(state, f, indent=2)
+    os.replace(path + ".tmp", path)
+
+def row_id(db, table, rowid):
+    row = db.execute(f"SELECT id FROM {table} WHERE rowid=?", (rowid,)).fetchone()
+    return row[0] if row else None
+
+def read_new_rows(db_path, table, state):
+    # rowid high-water mark per source table; INSERT OR REPLACE gets a new
+    # rowid, so updated rows are picked up again on the next export. The mark
+    # also keeps the id of the row it points at: replay.py empties its tables
+    # each run and sqlite then reuses rowids, so a different id there means
+    # the table was rewritten and is read again from the start.
+    key = f"{os.path.abspath(db_path)}:{table}"
+    if not os.path.exists(db_path):
+        return pd.DataFrame(), key, None
+    mark = state.get(key) or {"rowid": 0, "id": None}
+    if isinstance(mark, int):  # state files from before the id check
+        mark = {"rowid": mark, "id": None}
+    db = sqlite3.connect(db_path)
+    try:
+        exists = db.execute(
+            "SELECT 1 FROM sqlite_master WHERE type='table' AND name=?", (table,)
+        ).fetchone()
+        if not exists:
+            return pd.DataFrame(), key, None
+        top = db.execute(f"SELECT max(rowid) FROM {table}").fetchone()[0] or 0
+        current = row_id(db, table, mark["rowid"])
+        if top < mark["rowid"] or (current is not None and mark["id"] is not None and current != mark["id"]):
+            mark = {"rowid": 0, "id": None}
+        df = pd.read_sql_query(
+            f"SELECT rowid AS _rowid, * FROM {table} WHERE rowid > ? ORDER BY rowid",
+            db, params=(mark["rowid"],)
+        )
+        last = None
+        if not df.empty:
+            last = {"rowid": int(df["_rowid"].max()), "id": df["id"].iloc[-1]}
+    finally:
+        db.close()
+    return df.drop(columns="_rowid"), key, last
+
+def with_date(df):
+    ts = pd.to_datetime(df["timestamp"], utc=True, format="ISO8601", errors="coerce")
+    df["date"] = ts.dt.strftime("%Y-%m-%d").fillna("unknown")
+    return df
+
+def normalize_events(df):
+    df = df.copy()
+    # news_scraper.py writes the same table with category/assets instead of
+    # event_type/raw
+    if "event_type" not in df:
+        df["event_type"] = df.get("category")
+    if "raw" not in df:
+        df["raw"] = None
+    if "assets" not in df:
+        df["assets"] = [
+            json.dumps(json.loads(r).get("assets_affected", [])) if isinstance(r, str) else "[]"
+            for r in df["raw"]
+        ]
+    df["event_type"] = df["event_type"].fillna("other").replace("", "other")
+    return with_date(df)
+
+def explode_classifications(events):
+    rows = []
+    for e in events.itertuples(index=False):
+        try:
+            assets = json.loads(e.assets) if e.assets else []
+        except ValueError:
+            assets = []
+        for asset in assets:
+            rows.append({
+                "event_id": e.id, "asset": asset, "direction": e.direction,
+                "confidence": e.confidence, "sentiment": e.sentiment,
+                "timestamp": e.timestamp, "date": e.date, "event_type": e.event_type,
+            })
+    return pd.DataFrame(rows, columns=SCHEMAS["classifications"].names)
+
+def write(root, name, df):
+    if df.empty:
+        return 0
+    schema = SCHEMAS[name]
+    df = df.reindex(columns=schema.names)
+    for field in schema:
+        col = df[field.name]
+        if pa.types.is_integer(field.type):
+            df[field.name] = pd.to_numeric(col, errors="coerce").fillna(0).astype("int64")
+        elif pa.types.is_floating(field.type):
+            df[field.name] = pd.to_numeric(col, errors="coerce").astype("float64")
+        else:
+            df[field.name] = col.astype(object).where(col.notna(), None)
+    table = pa.Table.from_pandas(df, schema=schema, preserve_index=False)
+    ds.write_dataset(
+        table,
+        os.path.join(root, name),
+        format="parquet",
+        partitioning=PARTITIONS[name],
+        partitioning_flavor="hive",
+        basename_template=f"part-{uuid.uuid4().hex}-{{i}}.parquet",
+        existing_data_behavior="overwrite_or_ignore",
+    )
+    return len(df)
+
+def export(root=ARCHIVE_DIR, events_db="events.db", trades_db="trades.db", fills_db="replay.db"):
+    require_pyarrow()
+    os.makedirs(root, exist_ok=True)
+    state = load_state(root)
+    counts = {}
+
+    events, key, last = read_new_rows(events_db, "events", state)
+    if not events.empty:
+        events = normalize_events(events)
+        counts["events"] = write(root, "events", events)
+        counts["classifications"] = write(root, "classifications", explode_classifications(events))
+        state[key] = last
+
+    for name, db_path in (("trades", trades_db), ("fills", fills_db)):
+        df, key, last = read_new_rows(db_path, name, state)
+        if df.empty:
+            continue
+        df = with_date(df)
+        counts[name] = write(root, name, df)
+        state[key] = last
+
+    # state is saved last: a crash mid-export re-exports rather than loses rows
+    save_state(root, state)
+    return counts
+
+def dataset(name, root=ARCHIVE_DIR):
+    require_pyarrow()
+    return ds.dataset(
+        os.path.join(root, name),
+        format="parquet",
+        partitioning=ds.partitioning(
+            pa.schema([(col, pa.string()) for col in PARTITIONS[name]]), flavor="hive"
+        ),
+        filesystem=fs.LocalFileSystem(use_mmap=True),
+    )
+
+# filters: a pyarrow expression or DNF tuples, e.g. [("event_type", "=", "macro")].
+# Partition columns (date, event_type) prune whole directories before any read.
+def scan(name, filters=None, columns=None, root=ARCHIVE_DIR):
+    if filters is not None and not isinstance(filters, ds.Expression):
+        filters = pq.filters_to_expression(filters)
+    return dataset(name, root).to_table(columns=columns, filter=filters)
+
+# Signals in the same shape as headlines.csv, for backtest.py / parameter_optimizer.py
+def load_signals(root=ARCHIVE_DIR, start=None, end=None, min_confidence=None):
+    filters = []
+    if start:
+        filters.append(("date", ">=", str(start)))
+    if end:
+        filters.append(("date", "<=", str(end)))
+    if min_confidence is not None:
+        filters.append(("confidence", ">=", int(min_confidence)))
+    df = scan(
+        "events", filters or None, root=root,
+        columns=["headline", "summary", "assets", "direction", "confidence", "reason",
+                 "event_type", "timestamp"],
+    ).to_pandas()
+    df = df.rename(columns={"event_type": "category"})
+    return df[df["assets"] != "[]"].reset_index(drop=True)
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Incrementally export events, trades and fills to Parquet.")
+    parser.add_argument("--root", default=ARCHIVE_DIR)
+    parser.add_argument("--events-db", default="events.db")
+    parser.add_argument("--trades-db", default="trades.db")
+    parser.add_argument("--fills-db", default="replay.db")
+    args = parser.parse_args()
+    counts = export(args.root, args.events_db, args.trades_db, args.fills_db)
+    if counts:
+        for name, n in counts.items():
+            print(f"{name}: {n} rows archived")
+    else:
+        print("Archive is up to date.")
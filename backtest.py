@@ -1,9 +1,12 @@
+import argparse
+import json
+import os
+import numpy as np
 import pandas as pd
 import yfinance as yf
-import json
 import matplotlib.pyplot as plt
-
-df = pd.read_csv("headlines.csv")
+import archive
+import bar_store
 
 initial_equity = 100_000
 stop_loss_pct = -3.0
@@ -11,66 +14,198 @@ take_profit_pct = 5.0
 min_volatility_pct = 0.2
 max_trades_per_event = 3
 
-equity = initial_equity
-equity_curve = [equity]
-trade_log = []
+# intraday mode
+entry_delay_sec = 60
+slippage_bps = 5.0
+max_hold_sec = 5 * 86400
+max_entry_wait_sec = 4 * 86400
 
-for _, row in df.iterrows():
-    headline = row['headline']
-    summary = row['summary']
-    assets = json.loads(row['assets'])
-    direction = row['direction']
-    confidence = row['confidence']
-    reason = row['reason']
-    category = row['category']
-    timestamp = row['timestamp']
+# headlines.csv, or a Parquet archive directory written by archive.py
+def load_events(path="headlines.csv", start=None, end=None):
+    if os.path.isdir(path):
+        return archive.load_signals(path, start, end)
+    return pd.read_csv(path)
 
-    trades_count = 0
-    for symbol in assets:
-        if trades_count >= max_trades_per_event:
-            break
-        try:
-            data = yf.Ticker(symbol).history(period="7d")
-            if data.empty:
-                continue
-            prices = data['Close']
-            entry_price = prices.iloc[0]
-            vol = prices.pct_change().std() * 100
-            if vol < min_volatility_pct:
-                continue
-            exit_price = None
-            for price in prices:
-                pnl = (price - entry_price) / entry_price * 100
+# Original mode: prices are the last 7 days relative to *today*, not the event.
+def recent_trades(df):
+    trade_log = []
+    for _, row in df.iterrows():
+        assets = json.loads(row['assets'])
+        direction = row['direction']
+
+        trades_count = 0
+        for symbol in assets:
+            if trades_count >= max_trades_per_event:
+                break
+            try:
+                data = yf.Ticker(symbol).history(period="7d")
+                if data.empty:
+                    continue
+                prices = data['Close']
+                entry_price = prices.iloc[0]
+                vol = prices.pct_change().std() * 100
+                if vol < min_volatility_pct:
+                    continue
+                exit_price = None
+                for price in prices:
+                    pnl = (price - entry_price) / entry_price * 100
+                    if direction == "short":
+                        pnl = -pnl
+                    if pnl <= stop_loss_pct:
+                        exit_price = price
+                        break
+                    elif pnl >= take_profit_pct:
+                        exit_price = price
+                        break
+                if exit_price is None:
+                    exit_price = prices.iloc[-1]
+                pnl_final = (exit_price - entry_price) / entry_price * 100
                 if direction == "short":
-                    pnl = -pnl
-                if pnl <= stop_loss_pct:
-                    exit_price = price
-                    break
-                elif pnl >= take_profit_pct:
-                    exit_price = price
-                    break
-            if exit_price is None:
-                exit_price = prices.iloc[-1]
-            pnl_final = (exit_price - entry_price) / entry_price * 100
-            if direction == "short":
-                pnl_final = -pnl_final
-            equity += 1000 * pnl_final / 100
-            equity_curve.append(equity)
-            trade_log.append({
-                "date": timestamp,
+                    pnl_final = -pnl_final
+                trade_log.append({
+                    "date": row['timestamp'],
+                    "symbol": symbol,
+                    "side": direction,
+                    "confidence": row['confidence'],
+                    "pnl_pct": pnl_final,
+                    "reason": row['reason'],
+                    "category": row['category']
+                })
+                trades_count += 1
+            except Exception as e:
+                print(f"Error: {e}")
+    return pd.DataFrame(trade_log)
+
+# One row per (event, asset) with the index of the first bar after
+# timestamp + delay. Bars per symbol are loaded once and every event for that
+# symbol is aligned with a single searchsorted call.
+def align_events(df, interval="1m", entry_delay=entry_delay_sec, fetch=False):
+    rows = []
+    for _, row in df.iterrows():
+        try:
+            assets = json.loads(row['assets'])
+        except (TypeError, ValueError):
+            continue
+        event_ts = bar_store.to_epoch(row['timestamp'])
+        for symbol in assets[:max_trades_per_event]:
+            rows.append({
+                "date": row['timestamp'],
+                "event_ts": event_ts,
                 "symbol": symbol,
-                "side": direction,
-                "pnl_pct": pnl_final,
-                "reason": reason,
-                "category": category
+                "side": row['direction'],
+                "confidence": row['confidence'],
+                "reason": row['reason'],
+                "category": row['category'],
             })
-            trades_count += 1
-        except Exception as e:
-            print(f"Error: {e}")
+    entries = pd.DataFrame(rows)
+    bars = {}
+    if entries.empty:
+        return entries, bars
+    entries["entry_idx"] = -1
+    for symbol, grp in entries.groupby("symbol"):
+        series = bar_store.series(
+            symbol, grp["event_ts"].min() - 86400, grp["event_ts"].max() + max_hold_sec + max_entry_wait_sec,
+            interval, fetch=fetch
+        )
+        if not len(series):
+            continue
+        target = grp["event_ts"].to_numpy() + entry_delay
+        idx = series.align(target)
+        found = idx < len(series)
+        wait = np.full(len(idx), np.iinfo(np.int64).max)
+        wait[found] = series.ts[idx[found]] - target[found]
+        idx[wait > max_entry_wait_sec] = -1
+        entries.loc[grp.index, "entry_idx"] = idx
+        bars[symbol] = series
+    return entries[entries["entry_idx"] >= 0].reset_index(drop=True), bars
+
+# Walk intraday bars from the entry bar until SL/TP or max_hold. If one bar
+# touches both levels the stop is assumed to fill first.
+def simulate(series, i, direction, sl=stop_loss_pct, tp=take_profit_pct,
+             max_hold=max_hold_sec, slippage=slippage_bps):
+    slip = slippage / 10_000
+    sign = -1 if direction == "short" else 1
+    entry = series.open[i] * (1 + sign * slip)
+    j = max(i, series.last_index_before(series.ts[i] + max_hold))
+    opens = series.open[i:j + 1]
+    if sign > 0:
+        adverse = (series.low[i:j + 1] - entry) / entry * 100
+        favorable = (series.high[i:j + 1] - entry) / entry * 100
+    else:
+        adverse = (entry - series.high[i:j + 1]) / entry * 100
+        favorable = (entry - series.low[i:j + 1]) / entry * 100
+    sl_hits = np.flatnonzero(adverse <= sl)
+    tp_hits = np.flatnonzero(favorable >= tp)
+    k_sl = sl_hits[0] if len(sl_hits) else len(opens)
+    k_tp = tp_hits[0] if len(tp_hits) else len(opens)
+    if k_sl < len(opens) and k_sl <= k_tp:
+        k, level, exit_reason = k_sl, entry * (1 + sign * sl / 100), "stop_loss"
+        # gapped through the stop: fill at the open instead
+        exit_price = min(level, opens[k]) if sign > 0 else max(level, opens[k])
+    elif k_tp < len(opens):
+        k, level, exit_reason = k_tp, entry * (1 + sign * tp / 100), "take_profit"
+        exit_price = max(level, opens[k]) if sign > 0 else min(level, opens[k])
+    else:
+        k, exit_reason = len(opens) - 1, "time"
+        exit_price = series.close[j]
+    exit_price *= 1 - sign * slip
+    return {
+        "entry_time": int(series.ts[i]),
+        "exit_time": int(series.ts[i + k]),
+        "entry_price": entry,
+        "exit_price": exit_price,
+        "pnl_pct": sign * (exit_price - entry) / entry * 100,
+        "exit_reason": exit_reason,
+    }
+
+def intraday_trades(entries, bars, sl=stop_loss_pct, tp=take_profit_pct,
+                    max_hold=max_hold_sec, slippage=slippage_bps):
+    trade_log = []
+    for e in entries.itertuples(index=False):
+        result = simulate(bars[e.symbol], e.entry_idx, e.side, sl, tp, max_hold, slippage)
+        trade_log.append({
+            "date": e.date,
+            "symbol": e.symbol,
+            "side": e.side,
+            "confidence": e.confidence,
+            **result,
+            "reason": e.reason,
+            "category": e.category,
+        })
+    df = pd.DataFrame(trade_log)
+    if not df.empty:
+        df = df.sort_values("entry_time").reset_index(drop=True)
+    return df
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Backtest saved event signals.")
+    parser.add_argument("--events", default="headlines.csv",
+                        help="headlines.csv or an archive.py directory")
+    parser.add_argument("--start", default=None, help="archive only: first date, YYYY-MM-DD")
+    parser.add_argument("--end", default=None, help="archive only: last date, YYYY-MM-DD")
+    parser.add_argument("--intraday", action="store_true",
+                        help="enter on the first bar after each event timestamp using the bar store")
+    parser.add_argument("--interval", default="1m")
+    parser.add_argument("--entry-delay", type=int, default=entry_delay_sec, help="seconds after the event")
+    parser.add_argument("--slippage-bps", type=float, default=slippage_bps)
+    parser.add_argument("--fetch", action="store_true", help="download missing bars with yfinance")
+    args = parser.parse_args()
+
+    df = load_events(args.events, args.start, args.end)
+    if args.intraday:
+        entries, bars = align_events(df, args.interval, args.entry_delay, args.fetch)
+        df_trades = intraday_trades(entries, bars, slippage=args.slippage_bps)
+    else:
+        df_trades = recent_trades(df)
+
+    equity = initial_equity
+    equity_curve = [equity]
+    for pnl_final in df_trades.get("pnl_pct", []):
+        equity += 1000 * pnl_final / 100
+        equity_curve.append(equity)
 
-print("\nBacktest complete.")
-df_trades = pd.DataFrame(trade_log)
-df_trades.to_csv("backtest_results.csv", index=False)
-plt.plot(equity_curve)
-plt.title("Equity Curve")
-plt.show()
+    print("\nBacktest complete.")
+    df_trades.to_csv("backtest_results.csv", index=False)
+    plt.plot(equity_curve)
+    plt.title("Equity Curve")
+    plt.show()
@@ -0,0 +1,125 @@
+import sqlite3
+from datetime import datetime, timedelta, timezone
+import numpy as np
+import pandas as pd
+
+try:
+    import yfinance as yf
+except ImportError:
+    yf = None
+
+BARS_DB = "bars.db"
+
+# yfinance caps how far back (and how much per request) intraday bars go
+CHUNK_DAYS = {
+    "1m": 7, "2m": 59, "5m": 59, "15m": 59, "30m": 59,
+    "60m": 729, "1h": 729, "1d": 3650,
+}
+
+def init_db(path=BARS_DB):
+    db = sqlite3.connect(path, check_same_thread=False)
+    db.execute("""
+    CREATE TABLE IF NOT EXISTS bars (
+        symbol TEXT,
+        interval TEXT,
+        ts INTEGER,
+        open REAL,
+        high REAL,
+        low REAL,
+        close REAL,
+        volume REAL,
+        PRIMARY KEY (symbol, interval, ts)
+    )
+    """)
+    db.commit()
+    return db
+
+def to_epoch(t):
+    if isinstance(t, (int, np.integer)):
+        return int(t)
+    ts = pd.Timestamp(t)
+    if ts.tzinfo is None:
+        ts = ts.tz_localize("UTC")
+    return int(ts.timestamp())
+
+def download(symbol, start, end, interval="1m", db=None):
+    if yf is None:
+        raise RuntimeError("yfinance is not installed")
+    db = db or init_db()
+    start = datetime.fromtimestamp(to_epoch(start), timezone.utc)
+    end = datetime.fromtimestamp(to_epoch(end), timezone.utc)
+    step = timedelta(days=CHUNK_DAYS.get(interval, 7))
+    rows = 0
+    while start < end:
+        stop = min(start + step, end)
+        data = yf.Ticker(symbol).history(start=start, end=stop, interval=interval)
+        if not data.empty:
+            idx = data.index.tz_convert("UTC") if data.index.tz else data.index.tz_localize("UTC")
+            records = [
+                (symbol, interval, int(t.timestamp()), float(o), float(h), float(l), float(c), float(v))
+                for t, o, h, l, c, v in zip(
+                    idx, data["Open"], data["High"], data["Low"], data["Close"], data["Volume"]
+                )
+            ]
+            db.executemany("INSERT OR REPLACE INTO bars VALUES (?, ?, ?, ?, ?, ?, ?, ?)", records)
+            db.commit()
+            rows += len(records)
+        start = stop
+    return rows
+
+def load_bars(symbol, start=None, end=None, interval="1m", db=None):
+    db = db or init_db()
+    query = "SELECT ts, open, high, low, close, volume FROM bars WHERE symbol=? AND interval=?"
+    params = [symbol, interval]
+    if start is not None:
+        query += " AND ts >= ?"
+        params.append(to_epoch(start))
+    if end is not None:
+        query += " AND ts < ?"
+        params.append(to_epoch(end))
+    query += " ORDER BY ts"
+    return pd.read_sql_query(query, db, params=params)
+
+# Sorted numpy view of one symbol's bars; lookups are a binary search.
+class BarSeries:
+    def __init__(self, df):
+        self.ts = df["ts"].to_numpy(dtype=np.int64)
+        self.open = df["open"].to_numpy(dtype=float)
+        self.high = df["high"].to_numpy(dtype=float)
+        self.low = df["low"].to_numpy(dtype=float)
+        self.close = df["close"].to_numpy(dtype=float)
+
+    def __len__(self):
+        return len(self.ts)
+
+    def index_at(self, t):
+        # first bar starting at or after t, len(self) if none
+        return int(np.searchsorted(self.ts, to_epoch(t), side="left"))
+
+    def align(self, times):
+        # vectorized index_at for an array of epoch seconds
+        return np.searchsorted(self.ts, np.asarray(times, dtype=np.int64), side="left")
+
+    def last_index_before(self, t):
+        # last bar starting at or before t, -1 if none
+        return int(np.searchsorted(self.ts, to_epoch(t), side="right")) - 1
+
+def series(symbol, start=None, end=None, interval="1m", db=None, fetch=False):
+    df = load_bars(symbol, start, end, interval, db)
+    if df.empty and fetch and start is not None:
+        download(symbol, start, end or datetime.now(timezone.utc), interval, db)
+        df = load_bars(symbol, start, end, interval, db)
+    return BarSeries(df)
+
+if __name__ == "__main__":
+    import argparse
+    parser = argparse.ArgumentParser(description="Download bars into the local bar store.")
+    parser.add_argument("symbols", nargs="+")
+    parser.add_argument("--start", required=True, help="UTC start, e.g. 2024-03-01")
+    parser.add_argument("--end", default=None, help="UTC end (default: now)")
+    parser.add_argument("--interval", default="1m")
+    args = parser.parse_args()
+    end = args.end or datetime.now(timezone.utc)
+    for sym in args.symbols:
+        n = download(sym, args.start, end, args.interval)
+        print(f"{sym}: {n} {args.interval} bars stored")
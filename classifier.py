@@ -0,0 +1,160 @@
+import json
+import math
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+
+# Shared by every classification; slow calls that lose the race see their
+# cancel event and stop reading their stream, so workers free up quickly.
+POOL = ThreadPoolExecutor(max_workers=8, thread_name_prefix="classifier")
+
+# Incremental JSON object scanner for streamed LLM output. Tracks brace depth
+# outside of strings, so nested objects and prose/code fences around the JSON
+# are fine, and returns the first complete top-level object as soon as its
+# closing brace arrives.
+class JsonStream:
+    def __init__(self):
+        self.text = ""
+        self.pos = 0
+        self.start = None
+        self.depth = 0
+        self.in_str = False
+        self.esc = False
+
+    def feed(self, chunk):
+        self.text += chunk
+        while self.pos < len(self.text):
+            c = self.text[self.pos]
+            self.pos += 1
+            if self.in_str:
+                if self.esc:
+                    self.esc = False
+                elif c == "\\":
+                    self.esc = True
+                elif c == '"':
+                    self.in_str = False
+            elif c == '"' and self.start is not None:
+                self.in_str = True
+            elif c == "{":
+                if self.start is None:
+                    self.start = self.pos - 1
+                self.depth += 1
+            elif c == "}" and self.start is not None:
+                self.depth -= 1
+                if self.depth == 0:
+                    try:
+                        obj = json.loads(self.text[self.start:self.pos])
+                    except ValueError:
+                        obj = None
+                    self.start = None
+                    if isinstance(obj, dict):
+                        return obj
+        return None
+
+def extract_json(text):
+    obj = JsonStream().feed(text or "")
+    return obj if obj is not None else {}
+
+# Weighted vote over the models that answered: the direction with the most
+# weight*confidence wins, and its confidence is that support divided by
+# `total`, the weight of every model asked (default: those that answered).
+# Disagreement, "no trade" answers and models that timed out all pull it down.
+def vote(results, total=None):
+    support = {}
+    if total is None:
+        total = sum(weight for _, weight, _ in results)
+    for name, weight, evt in results:
+        direction = evt.get("direction")
+        if direction:
+            support.setdefault(direction, []).append((name, weight, evt))
+    if not support or not total:
+        return None
+    direction, agreeing = max(
+        support.items(), key=lambda kv: sum(w * e.get("confidence", 0) for _, w, e in kv[1])
+    )
+    best = max(agreeing, key=lambda r: r[2].get("confidence", 0))[2]
+    assets = []
+    for _, _, evt in agreeing:
+        for asset in evt.get("assets_affected", []):
+            if asset not in assets:
+                assets.append(asset)
+    evt = dict(best)
+    evt["assets_affected"] = assets
+    evt["confidence"] = round(sum(w * e.get("confidence", 0) for _, w, e in agreeing) / total)
+    evt["models"] = [name for name, _, _ in agreeing]
+    return evt
+
+DIRECTIONS = {"long", "short"}
+
+# Only well-formed answers reach vote() and handle(): confidence is coerced to
+# a number (models sometimes answer "confidence": "90"), direction must be
+# long/short, reason present and assets_affected a list of strings. Anything
+# else becomes {}.
+def clean_answer(name, evt):
+    if not isinstance(evt, dict) or not evt:
+        return {}
+    try:
+        confidence = float(evt.get("confidence", 0))
+    except (TypeError, ValueError):
+        confidence = math.nan
+    direction = evt.get("direction")
+    direction = direction.strip().lower() if isinstance(direction, str) else None
+    assets = evt.get("assets_affected", [])
+    problem = None
+    if not math.isfinite(confidence):
+        problem = f"non-numeric confidence {evt.get('confidence')!r}"
+    elif direction not in DIRECTIONS:
+        problem = f"direction {evt.get('direction')!r}"
+    elif not evt.get("reason"):
+        problem = "no reason"
+    elif not isinstance(assets, list) or not all(isinstance(a, str) for a in assets):
+        problem = f"assets_affected {assets!r}"
+    if problem:
+        print(f"{name} answer rejected: {problem}")
+        return {}
+    evt["confidence"] = int(confidence) if confidence.is_integer() else confidence
+    evt["direction"] = direction
+    evt["assets_affected"] = assets
+    return evt
+
+# models: [(name, fn, weight)], fn(cancel_event) -> dict.
+# mode "first": return the first answer at or above threshold.
+# mode "vote":  wait for every model (up to the deadline) and vote.
+# Either way nothing waits past the deadline, so latency is bounded by
+# min(deadline, slowest model) rather than the sum of the models.
+def route(models, threshold, deadline=8.0, mode="first"):
+    cancel = threading.Event()
+    futures = {POOL.submit(fn, cancel): (name, weight) for name, fn, weight in models}
+    pending = set(futures)
+    results = []
+    end = time.monotonic() + deadline
+    try:
+        while pending:
+            remaining = end - time.monotonic()
+            if remaining <= 0:
+                break
+            done, pending = wait(pending, timeout=remaining, return_when=FIRST_COMPLETED)
+            for f in done:
+                name, weight = futures[f]
+                try:
+                    evt = f.result()
+                except Exception as e:
+                    print(f"{name} error: {e}")
+                    evt = {}
+                evt = clean_answer(name, evt)
+                if not evt:
+                    continue
+                if mode == "first" and evt.get("confidence", 0) >= threshold:
+                    evt["models"] = [name]
+                    return evt
+                results.append((name, weight, evt))
+    finally:
+        cancel.set()
+        for f in pending:
+            f.cancel()
+    if mode != "vote":
+        return None
+    evt = vote(results, sum(weight for _, _, weight in models))
+    if not evt or evt.get("confidence", 0) < threshold:
+        return None
+    return evt
@@ -1,16 +1,22 @@
 import os
 import time
 import json
-import re
 import hashlib
 import sqlite3
-import feedparser
+import threading
 import requests
 from datetime import datetime as dt
 from decimal import Decimal, ROUND_DOWN
 from dotenv import load_dotenv
 from openai import OpenAI
 import google.generativeai as genai
+import classifier
+import feed_reader
+import metrics
+import outbox
+import sources
+import tickers
+from sizing import TOTAL_CAPITAL_EUR, MAX_POSITION_PCT, CONF_THRESHOLD, pos_size
 
 try:
     import alpaca_trade_api as trade_api
@@ -31,6 +37,11 @@ else:
 # OpenAI
 client = OpenAI(api_key=os.getenv("OPENAI_API_KEY"))
 
+# Optional local model behind an OpenAI-compatible endpoint (e.g. Ollama)
+LOCAL_LLM_URL = os.getenv("LOCAL_LLM_URL")
+LOCAL_LLM_MODEL = os.getenv("LOCAL_LLM_MODEL", "llama3.1")
+local_client = OpenAI(base_url=LOCAL_LLM_URL, api_key="local") if LOCAL_LLM_URL else None
+
 # Telegram
 TG_TOKEN = os.getenv("TELEGRAM_BOT_TOKEN")
 TG_CHAT = os.getenv("TELEGRAM_CHAT_ID")
@@ -47,30 +58,22 @@ if TRADE_ENABLED:
 else:
     alpaca = None
 
-# Config
-TOTAL_CAPITAL_EUR = 1000
-MAX_POSITION_PCT = 0.05
-CONF_THRESHOLD = 80
+# Config (capital, position and threshold settings live in sizing.py)
 EURUSD_FX_RATE = 1.08
+NEWS_MAX_AGE_SEC = int(float(os.getenv("NEWS_MAX_AGE_HOURS", "1")) * 3600)  # per-source max_age overrides it
+METRICS_PORT = int(os.getenv("METRICS_PORT", "9108"))  # 0 disables the endpoint
+CLASSIFY_MODE = os.getenv("CLASSIFY_MODE", "first")  # "first" or "vote"
+CLASSIFY_DEADLINE_SEC = float(os.getenv("CLASSIFY_DEADLINE_SEC", "8"))
+MODEL_WEIGHTS = {"gpt": 1.0, "gemini": 1.0, "local": 0.5}
 
-# Whitelisted Twitter handles
-try:
-    with open("whitelisted_accounts.json", "r") as f:
-        WHITELISTED_ACCOUNTS = json.load(f)
-except:
-    WHITELISTED_ACCOUNTS = [
-        "Bloomberg", "Reuters", "howardlindzon", "RampCapitalLLC",
-        "charliebilello", "sentimenttrader", "KobeissiLetter",
-        "KailashConcepts", "hhhypergrowth", "FinancialJuice",
-        "AlmanackReport", "TheTranscript_"
-    ]
-
-# Feeds
-FEEDS = [
-    "https://feeds.reuters.com/reuters/worldNews",
-    "https://feeds.bbci.co.uk/news/world/rss.xml",
-    "https://www.aljazeera.com/xml/rss/all.xml",
-]
+# Local symbol master used to validate LLM tickers before any broker call
+SYMBOLS = tickers.SymbolIndex(tickers.SYMBOLS_FILE)
+if not len(SYMBOLS):
+    print(f"⚠️ {tickers.SYMBOLS_FILE} not found: model tickers are only format-checked, "
+          f"not validated. Build it with `python tickers.py --refresh`.")
+
+# News sources: RSS feeds, JSON APIs and the whitelisted social accounts
+SOURCES = sources.load_sources("feeds.json", "whitelisted_accounts.json", max_age=NEWS_MAX_AGE_SEC)
 
 # Prompt
 EVENT_PROMPT = """
@@ -90,21 +93,39 @@ Return {} if no trade.
 """
 
 # SQLite
-DB = sqlite3.connect("events.db", check_same_thread=False)
-DB.execute("""
-CREATE TABLE IF NOT EXISTS events (
-    id TEXT PRIMARY KEY,
-    headline TEXT,
-    summary TEXT,
-    confidence INTEGER,
-    direction TEXT,
-    reason TEXT,
-    event_type TEXT,
-    sentiment TEXT,
-    timestamp TEXT
-)
-""")
-DB.commit()
+DB_PATH = "events.db"
+
+def init_db(path=DB_PATH):
+    db = sqlite3.connect(path, check_same_thread=False)
+    # WAL lets the outbox executor's connection write while ingest reads
+    db.execute("PRAGMA journal_mode=WAL")
+    db.execute("""
+    CREATE TABLE IF NOT EXISTS events (
+        id TEXT PRIMARY KEY,
+        headline TEXT,
+        summary TEXT,
+        confidence INTEGER,
+        direction TEXT,
+        reason TEXT,
+        event_type TEXT,
+        sentiment TEXT,
+        timestamp TEXT
+    )
+    """)
+    # full LLM output, kept for the analytics archive
+    cols = [r[1] for r in db.execute("PRAGMA table_info(events)")]
+    if "raw" not in cols:
+        db.execute("ALTER TABLE events ADD COLUMN raw TEXT")
+    db.commit()
+    feed_reader.init_cursors(db)
+    outbox.init_outbox(db)
+    return db
+
+DB = init_db(DB_PATH)
+
+# Background outbox drainer, started by the bot's main loop. Without it
+# handle() drains the outbox inline.
+EXECUTOR = None
 
 def sha(text):
     return hashlib.sha256(text.encode()).hexdigest()
@@ -112,90 +133,133 @@ def sha(text):
 def seen(uid):
     return DB.execute("SELECT 1 FROM events WHERE id=?", (uid,)).fetchone() is not None
 
-def mark_event(uid, headline, summary, confidence, direction, reason, event_type, sentiment):
+def mark_event(uid, headline, summary, confidence, direction, reason, event_type, sentiment,
+               timestamp=None, raw=None, commit=True):
     DB.execute("""
         INSERT INTO events
-        (id, headline, summary, confidence, direction, reason, event_type, sentiment, timestamp)
-        VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+        (id, headline, summary, confidence, direction, reason, event_type, sentiment, timestamp, raw)
+        VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
     """, (
-        uid, headline, summary, confidence, direction, reason, event_type, sentiment, dt.utcnow().isoformat()
+        uid, headline, summary, confidence, direction, reason, event_type, sentiment,
+        timestamp or dt.utcnow().isoformat(), raw
     ))
-    DB.commit()
+    if commit:
+        DB.commit()
 
-def fetch_news():
-    for url in FEEDS:
-        try:
-            feed = feedparser.parse(url)
-            for e in feed.entries:
-                uid = sha(e.title)
-                if seen(uid):
-                    continue
-                published_time = dt.utcnow()
-                if hasattr(e, "published_parsed") and e.published_parsed:
-                    published_time = dt(*e.published_parsed[:6])
-                if (dt.utcnow() - published_time).total_seconds() > 3600:
-                    continue
-                yield e.title, getattr(e, "summary", "")
-        except Exception as e:
-            print(f"Feed error: {e}")
-
-# placeholder
-def fetch_twitter():
-    for account in WHITELISTED_ACCOUNTS:
-        yield f"{account}: Breaking news"
-
-def gpt_json(prompt, user_msg):
+def record_usage(usage, name):
+    if usage is not None:
+        metrics.LLM_TOKENS.inc(usage.prompt_tokens or 0, model=name, kind="prompt")
+        metrics.LLM_TOKENS.inc(usage.completion_tokens or 0, model=name, kind="completion")
+
+# The usage chunk only arrives after the content. Once the answer is in hand
+# the rest of the stream is read on a daemon thread, so the caller does not
+# wait for it.
+def finish_stream(stream, name):
+    usage = None
+    try:
+        for chunk in stream:
+            usage = getattr(chunk, "usage", None) or usage
+    except Exception:
+        pass
+    finally:
+        stream.close()
+    record_usage(usage, name)
+
+# Model calls stream their output and stop as soon as the JSON object closes,
+# or as soon as the router sets `cancel` because another model already won.
+# A cancelled call never sees its usage chunk, so its tokens are not counted.
+def gpt_json(prompt, user_msg, cancel=None, llm=None, model="gpt-4o-mini", name="gpt"):
+    t0 = time.perf_counter()
+    chunks = 0
+    usage = None
+    handed_off = False
     try:
-        resp = client.chat.completions.create(
-            model="gpt-4o-mini",
+        stream = (llm or client).chat.completions.create(
+            model=model,
             messages=[
                 {"role": "system", "content": prompt},
                 {"role": "user", "content": user_msg}
             ],
-            temperature=0.2
+            temperature=0.2,
+            stream=True,
+            stream_options={"include_usage": True},
+            timeout=CLASSIFY_DEADLINE_SEC
         )
-        return json.loads(resp.choices[0].message.content)
+        parser = classifier.JsonStream()
+        try:
+            for chunk in stream:
+                usage = getattr(chunk, "usage", None) or usage
+                if cancel is not None and cancel.is_set():
+                    return {}
+                delta = chunk.choices[0].delta.content if chunk.choices else None
+                if delta:
+                    chunks += 1
+                    obj = parser.feed(delta)
+                    if obj is not None:
+                        handed_off = True
+                        threading.Thread(target=finish_stream, args=(stream, name), daemon=True).start()
+                        return obj
+        finally:
+            if not handed_off:
+                stream.close()
+                record_usage(usage, name)
+            metrics.LLM_CHUNKS.inc(chunks, model=name)
+            metrics.LLM_LATENCY.observe(time.perf_counter() - t0, model=name)
+        return {}
     except Exception as e:
         print(f"GPT error: {e}")
         return {}
 
-def gemini_json(prompt: str) -> dict:
+def gemini_json(prompt: str, cancel=None) -> dict:
     if not gemini_model:
         return {}
+    t0 = time.perf_counter()
+    usage = None
     try:
-        response = gemini_model.generate_content(prompt)
-        content = getattr(response, "text", None)
-        if not content or not content.strip():
-            return {}
-        match = re.search(r"\{.*?\}", content, re.DOTALL)
-        if match:
-            return json.loads(match.group(0))
+        response = gemini_model.generate_content(
+            prompt, stream=True, request_options={"timeout": CLASSIFY_DEADLINE_SEC}
+        )
+        parser = classifier.JsonStream()
+        for chunk in response:
+            usage = getattr(chunk, "usage_metadata", None) or usage
+            if cancel is not None and cancel.is_set():
+                return {}
+            obj = parser.feed(getattr(chunk, "text", "") or "")
+            if obj is not None:
+                return obj
     except Exception as e:
         print(f"Gemini error: {e}")
         return {}
+    finally:
+        if usage is not None:
+            metrics.LLM_TOKENS.inc(getattr(usage, "prompt_token_count", 0) or 0, model="gemini", kind="prompt")
+            metrics.LLM_TOKENS.inc(getattr(usage, "candidates_token_count", 0) or 0, model="gemini",
+                                   kind="completion")
+        metrics.LLM_LATENCY.observe(time.perf_counter() - t0, model="gemini")
     return {}
 
-def pos_size(conf):
-    w = (conf - CONF_THRESHOLD) / (100 - CONF_THRESHOLD)
-    w = max(0, min(1, w))
-    return round(TOTAL_CAPITAL_EUR * MAX_POSITION_PCT * (0.6 + 0.4 * w), 2)
+def local_json(prompt, user_msg, cancel=None):
+    if not local_client:
+        return {}
+    return gpt_json(prompt, user_msg, cancel, llm=local_client, model=LOCAL_LLM_MODEL, name="local")
 
+# Raises on failure so the outbox retries the alert
 def tg(msg):
     if TG_TOKEN and TG_CHAT:
-        try:
-            r = requests.post(
-                f"https://api.telegram.org/bot{TG_TOKEN}/sendMessage",
-                data={"chat_id": TG_CHAT, "text": msg, "parse_mode": "Markdown"},
-                timeout=10
-            )
-            if not r.ok:
-                print(f"Telegram error {r.status_code}: {r.text}")
-        except Exception as e:
-            print(f"Telegram error: {e}")
+        r = requests.post(
+            f"https://api.telegram.org/bot{TG_TOKEN}/sendMessage",
+            data={"chat_id": TG_CHAT, "text": msg, "parse_mode": "Markdown"},
+            timeout=10
+        )
+        if not r.ok:
+            raise RuntimeError(f"Telegram error {r.status_code}: {r.text}")
     else:
         print(msg)
 
-def place_trade(ticker, direction, size_eur):
+# (False, None) is a final refusal (no price, zero qty, a 4xx from Alpaca);
+# transient errors (timeouts, 5xx, 429) raise so the outbox retries them.
+
+def place_trade(ticker, direction, size_eur, client_order_id=None):
     if not alpaca:
         return False, None
     size_usd = size_eur * EURUSD_FX_RATE
@@ -213,56 +277,119 @@ def place_trade(ticker, direction, size_eur):
             qty=float(qty),
             side=side,
             type="market",
-            time_in_force="day"
+            time_in_force="day",
+            client_order_id=client_order_id
         )
+        metrics.ORDERS.inc(status="accepted")
         return True, order.id
     except Exception as e:
-        tg(f"Alpaca error: {e}")
-        return False, None
+        if client_order_id:
+            # replayed after a crash: the first submit may already have landed
+            try:
+                order = alpaca.get_order_by_client_order_id(client_order_id)
+                metrics.ORDERS.inc(status="duplicate")
+                return True, order.id
+            except Exception:
+                pass
+        status = getattr(e, "status_code", None)
+        if status and 400 <= status < 500 and status != 429:
+            metrics.ORDERS.inc(status="rejected")
+            print(f"Alpaca rejected {ticker}: {e}")
+            return False, None
+        metrics.ORDERS.inc(status="error")
+        raise
 
-def process():
-    found = False
-    sources = list(fetch_news()) + list(fetch_twitter())
-    for item in sources:
-        if isinstance(item, tuple):
-            title, summary = item
-        else:
-            title, summary = item, ""
-        user_msg = f"HEADLINE: {title}\nSUMMARY: {summary}"
-        evt = gpt_json(EVENT_PROMPT, user_msg)
-        if not evt or evt.get("confidence", 0) < CONF_THRESHOLD:
-            evt = gemini_json(f"{EVENT_PROMPT}\n\n{user_msg}")
-        if not evt or evt.get("confidence", 0) < CONF_THRESHOLD:
-            continue
-        uid = sha(title)
-        if seen(uid):
-            continue
+def order_status(order_id):
+    return alpaca.get_order(order_id).status
+
+# All configured models are asked at once; see classifier.route.
+def classify(title, summary):
+    user_msg = f"HEADLINE: {title}\nSUMMARY: {summary}"
+    candidates = SYMBOLS.extract(f"{title}\n{summary}")
+    if candidates:
+        user_msg += f"\nTICKERS MENTIONED (may be incidental): {', '.join(candidates)}"
+    models = [("gpt", lambda cancel: gpt_json(EVENT_PROMPT, user_msg, cancel), MODEL_WEIGHTS["gpt"])]
+    if gemini_model:
+        models.append((
+            "gemini",
+            lambda cancel: gemini_json(f"{EVENT_PROMPT}\n\n{user_msg}", cancel),
+            MODEL_WEIGHTS["gemini"]
+        ))
+    if local_client:
+        models.append(("local", lambda cancel: local_json(EVENT_PROMPT, user_msg, cancel), MODEL_WEIGHTS["local"]))
+    return classifier.route(models, CONF_THRESHOLD, CLASSIFY_DEADLINE_SEC, CLASSIFY_MODE)
+
+# One headline through classify -> mark -> trade -> alert. The replay engine
+# swaps in its own classifier/trader/notify so it runs this exact code path.
+# The event and its orders/alert are journaled in one transaction; the outbox
+# then executes them (in the background when EXECUTOR is running).
+def handle(title, summary, classifier=None, trader=None, notify=None, timestamp=None):
+    classifier = classifier or classify
+    uid = sha(title)
+    if seen(uid):
+        metrics.HEADLINES_DEDUPED.inc()
+        metrics.CACHE.inc(cache="seen", result="hit")
+        return False
+    metrics.CACHE.inc(cache="seen", result="miss")
+    with metrics.CLASSIFY_LATENCY.time():
+        evt = classifier(title, summary)
+    if not evt or evt.get("confidence", 0) < CONF_THRESHOLD:
+        metrics.HEADLINES_CLASSIFIED.inc(result="no_signal")
+        return False
+    metrics.HEADLINES_CLASSIFIED.inc(result="signal")
+    evt["assets_affected"], rejected = SYMBOLS.validate(evt.get("assets_affected", []))
+    metrics.CACHE.inc(len(evt["assets_affected"]), cache="symbols", result="hit")
+    metrics.CACHE.inc(len(rejected), cache="symbols", result="miss")
+    if rejected:
+        evt["rejected_assets"] = rejected
+    size = pos_size(evt['confidence'])
+    msg = (
+        f"🔥 *Event Signal* ({evt['confidence']}%)\n"
+        f"*Headline:* {title}\n"
+        f"*Type:* {evt.get('event_type', 'other')}\n"
+        f"*Sentiment:* {evt.get('sentiment', 'neutral')}\n"
+        f"*Direction:* {evt['direction']}\n"
+        f"*Reason:* {evt['reason']}\n"
+        f"*Size:* €{size}"
+    )
+    orders = []
+    if trader or TRADE_ENABLED:
+        orders = [
+            {"symbol": asset, "direction": evt['direction'], "size_eur": size}
+            for asset in evt["assets_affected"]
+        ]
+    alert = {"text": msg, "assets": evt["assets_affected"], "rejected": rejected}
+    with DB:
         mark_event(
             uid, title, summary,
             evt['confidence'], evt['direction'], evt['reason'],
-            evt.get("event_type", "other"), evt.get("sentiment", "neutral")
+            evt.get("event_type", "other"), evt.get("sentiment", "neutral"),
+            timestamp, json.dumps(evt), commit=False
         )
-        size = pos_size(evt['confidence'])
-        msg = (
-            f"🔥 *Event Signal* ({evt['confidence']}%)\n"
-            f"*Headline:* {title}\n"
-            f"*Type:* {evt.get('event_type', 'other')}\n"
-            f"*Sentiment:* {evt.get('sentiment', 'neutral')}\n"
-            f"*Direction:* {evt['direction']}\n"
-            f"*Reason:* {evt['reason']}\n"
-            f"*Size:* €{size}"
-        )
-        for asset in evt.get("assets_affected", []):
-            msg += f"\n*Asset:* `{asset}`"
-            if TRADE_ENABLED:
-                success, oid = place_trade(asset, evt['direction'], size)
-                msg += f"\nExec: {'✅' if success else '❌'}"
-        tg(msg)
-        found = True
+        outbox.enqueue(DB, uid, orders, alert)
+    if EXECUTOR and trader is None and notify is None:
+        EXECUTOR.wake()
+    else:
+        outbox.drain(DB, trader or place_trade, notify or tg)
+    return True
+
+def process():
+    found = False
+    for item in sources.poll_all(SOURCES, DB, seen):
+        if handle(item["title"], item["summary"]):
+            found = True
     return found
 
 if __name__ == "__main__":
-    print("[EventTrader v0.9] running with Twitter + JSON whitelist + Gemini fallback")
+    print("[EventTrader v0.9] running with Twitter + JSON whitelist + GPT/Gemini ensemble")
+    if METRICS_PORT:
+        metrics.serve(METRICS_PORT)
+        print(f"Metrics on http://127.0.0.1:{METRICS_PORT}/metrics")
+    metrics.install_profile_trigger()
+    EXECUTOR = outbox.Executor(
+        DB_PATH, place_trade, tg, order_status=order_status if alpaca else None
+    ).start()
     while True:
-        found = process()
+        with metrics.PROCESS_LATENCY.time(), metrics.profile_if_requested("process"):
+            found = process()
         time.sleep(600)
\ No newline at end of file
@@ -0,0 +1,232 @@
+import os
+import signal
+import sys
+import threading
+import time
+from collections import Counter as Tally
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+REGISTRY = []
+
+def label_key(labels, names):
+    return tuple(str(labels.get(n, "")) for n in names)
+
+def format_labels(names, values, extra=()):
+    pairs = [f'{n}="{v}"' for n, v in zip(names, values)] + list(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+class Counter:
+    def __init__(self, name, help, labels=()):
+        self.name = name
+        self.help = help
+        self.labels = tuple(labels)
+        self.values = {}
+        self.lock = threading.Lock()
+        REGISTRY.append(self)
+
+    def inc(self, n=1, **labels):
+        key = label_key(labels, self.labels)
+        with self.lock:
+            self.values[key] = self.values.get(key, 0) + n
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} counter"]
+        with self.lock:
+            for key, v in sorted(self.values.items()):
+                lines.append(f"{self.name}{format_labels(self.labels, key)} {v}")
+        return lines
+
+class Histogram:
+    BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30)
+
+    def __init__(self, name, help, labels=(), buckets=BUCKETS):
+        self.name = name
+        self.help = help
+        self.labels = tuple(labels)
+        self.buckets = tuple(buckets)
+        self.values = {}  # key -> [bucket counts..., count, sum]
+        self.lock = threading.Lock()
+        REGISTRY.append(self)
+
+    def observe(self, v, **labels):
+        key = label_key(labels, self.labels)
+        with self.lock:
+            row = self.values.setdefault(key, [0] * (len(self.buckets) + 2))
+            for i, b in enumerate(self.buckets):
+                if v <= b:
+                    row[i] += 1
+            row[-2] += 1
+            row[-1] += v
+
+    @contextmanager
+    def time(self, **labels):
+        t0 = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - t0, **labels)
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} histogram"]
+        with self.lock:
+            for key, row in sorted(self.values.items()):
+                for b, n in zip(self.buckets, row):
+                    le = format_labels(self.labels, key, [f'le="{b}"'])
+                    lines.append(f"{self.name}_bucket{le} {n}")
+                le = format_labels(self.labels, key, ['le="+Inf"'])
+                lines.append(f"{self.name}_bucket{le} {row[-2]}")
+                lines.append(f"{self.name}_count{format_labels(self.labels, key)} {row[-2]}")
+                lines.append(f"{self.name}_sum{format_labels(self.labels, key)} {row[-1]}")
+        return lines
+
+def render():
+    lines = []
+    for m in REGISTRY:
+        lines.extend(m.render())
+    return "\n".join(lines) + "\n"
+
+# Pipeline metrics
+FEEDS_FETCHED = Counter("eventtrader_feeds_fetched_total", "Feed polls by outcome", ["status"])
+FEED_BYTES = Counter("eventtrader_feed_bytes_total", "Bytes downloaded from feeds")
+HEADLINES_SEEN = Counter("eventtrader_headlines_seen_total", "Headlines read from sources", ["source"])
+HEADLINES_DEDUPED = Counter("eventtrader_headlines_deduped_total", "Headlines skipped as already seen")
+HEADLINES_CLASSIFIED = Counter("eventtrader_headlines_classified_total", "Classified headlines", ["result"])
+CACHE = Counter("eventtrader_cache_requests_total", "Cache lookups", ["cache", "result"])
+LLM_LATENCY = Histogram("eventtrader_llm_latency_seconds", "Per-model LLM call latency", ["model"])
+LLM_TOKENS = Counter("eventtrader_llm_tokens_total", "LLM tokens reported by the provider", ["model", "kind"])
+LLM_CHUNKS = Counter("eventtrader_llm_stream_chunks_total", "Streamed LLM content chunks received", ["model"])
+CLASSIFY_LATENCY = Histogram("eventtrader_classify_latency_seconds", "End-to-end classification latency")
+ORDERS = Counter("eventtrader_orders_submitted_total", "Orders sent to the broker", ["status"])
+FILLS = Counter("eventtrader_fills_total", "Order fills", ["broker"])
+PROCESS_LATENCY = Histogram("eventtrader_process_seconds", "Duration of one process() cycle",
+                            buckets=(1, 5, 10, 30, 60, 120, 300, 600))
+
+class Handler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        if self.path.split("?")[0] != "/metrics":
+            self.send_error(404)
+            return
+        body = render().encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "text/plain; version=0.0.4")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+def serve(port, host="127.0.0.1"):
+    server = ThreadingHTTPServer((host, port), Handler)
+    threading.Thread(target=server.serve_forever, daemon=True, name="metrics").start()
+    return server
+
+# ============================
+# Sampling profiler
+# ============================
+
+# Samples one thread's stack every `interval` seconds from a background
+# thread and aggregates them as collapsed stacks ("a;b;c count").
+class Sampler:
+    def __init__(self, thread_id, interval=0.005):
+        self.thread_id = thread_id
+        self.interval = interval
+        self.stacks = Tally()
+        self.stop_event = threading.Event()
+        self.thread = threading.Thread(target=self.run, daemon=True, name="profiler")
+
+    def run(self):
+        while not self.stop_event.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            stack = []
+            while frame is not None:
+                code = frame.f_code
+                stack.append(f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})")
+                frame = frame.f_back
+            if stack:
+                self.stacks[";".join(reversed(stack))] += 1
+
+    def start(self):
+        self.thread.start()
+
+    def stop(self):
+        self.stop_event.set()
+        self.thread.join()
+
+def write_folded(stacks, path):
+    with open(path, "w") as f:
+        for stack, n in stacks.most_common():
+            f.write(f"{stack} {n}\n")
+
+def write_svg(stacks, path, width=1200, row=16):
+    # minimal icicle-style flamegraph: root at the top, width = sample share
+    tree = {"n": 0, "kids": {}}
+    for stack, n in stacks.items():
+        node = tree
+        node["n"] += n
+        for name in stack.split(";"):
+            node = node["kids"].setdefault(name, {"n": 0, "kids": {}})
+            node["n"] += n
+    total = tree["n"] or 1
+    rects = []
+    depth = [0]
+
+    def walk(node, x, level):
+        depth[0] = max(depth[0], level)
+        for name, kid in sorted(node["kids"].items()):
+            w = kid["n"] / total * width
+            if w >= 0.5:
+                label = name if w > 7 * len(name) else name[: int(w / 7)]
+                hue = 20 + hash(name) % 40
+                rects.append(
+                    f'<g><title>{escape(name)} ({kid["n"]} samples, {kid["n"] / total:.1%})</title>'
+                    f'<rect x="{x:.1f}" y="{level * row}" width="{w:.1f}" height="{row - 1}" '
+                    f'fill="hsl({hue},90%,60%)"/>'
+                    f'<text x="{x + 2:.1f}" y="{level * row + row - 4}" font-size="11">{escape(label)}</text></g>'
+                )
+                walk(kid, x, level + 1)
+            x += w
+
+    walk(tree, 0.0, 0)
+    with open(path, "w") as f:
+        f.write(f'<svg xmlns="http://www.w3.org/2000/svg" width="{width}" height="{(depth[0] + 1) * row}" '
+                f'font-family="monospace">\n')
+        f.write("\n".join(rects))
+        f.write("\n</svg>\n")
+
+def escape(s):
+    return s.replace("&", "&amp;").replace("<", "&lt;").replace(">", "&gt;")
+
+PROFILE_FLAG = os.getenv("PROFILE_FLAG", "profile.flag")
+PROFILE_DIR = os.getenv("PROFILE_DIR", "profiles")
+_profile_requested = threading.Event()
+
+def request_profile(*_):
+    _profile_requested.set()
+
+# `kill -USR1 <pid>` or `touch profile.flag` profiles the next wrapped call
+def install_profile_trigger():
+    if hasattr(signal, "SIGUSR1"):
+        signal.signal(signal.SIGUSR1, request_profile)
+
+@contextmanager
+def profile_if_requested(name="process"):
+    if os.path.exists(PROFILE_FLAG):
+        os.remove(PROFILE_FLAG)
+        _profile_requested.set()
+    if not _profile_requested.is_set():
+        yield
+        return
+    _profile_requested.clear()
+    sampler = Sampler(threading.get_ident())
+    sampler.start()
+    try:
+        yield
+    finally:
+        sampler.stop()
+        os.makedirs(PROFILE_DIR, exist_ok=True)
+        base = os.path.join(PROFILE_DIR, f"{name}-{time.strftime('%Y%m%d-%H%M%S')}")
+        write_folded(sampler.stacks, base + ".folded")
+        write_svg(sampler.stacks, base + ".svg")
+        print(f"Profile written to {base}.svg ({sum(sampler.stacks.values())} samples)")
@@ -0,0 +1,111 @@
+import argparse
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
+import pandas as pd
+import sizing
+
+# paths x trades cells simulated per chunk (~8 bytes each, a few arrays live
+# at once), so memory per worker stays flat however long the trade log is
+CHUNK_CELLS = 5_000_000
+# drawdown (%) below which the score stops rewarding a smoother path; without
+# it a few all-winning trades (p95 drawdown ~0) score near infinity
+MIN_SCORE_DD_PCT = 1.0
+
+# (n_paths, n_trades) resampled trade indices. block=1 is an iid bootstrap;
+# block>1 is a circular block bootstrap that keeps runs of consecutive trades
+# (streaks, clustered events) together.
+def bootstrap_indices(rng, n_trades, n_paths, block=1):
+    if block <= 1:
+        return rng.integers(0, n_trades, size=(n_paths, n_trades))
+    n_blocks = -(-n_trades // block)
+    starts = rng.integers(0, n_trades, size=(n_paths, n_blocks, 1))
+    idx = (starts + np.arange(block)) % n_trades
+    return idx.reshape(n_paths, -1)[:, :n_trades]
+
+def simulate_chunk(pnl_eur, n_paths, block, seed, capital, ruin_pct):
+    rng = np.random.default_rng(seed)
+    idx = bootstrap_indices(rng, len(pnl_eur), n_paths, block)
+    equity = capital + np.cumsum(pnl_eur[idx], axis=1)
+    peak = np.maximum(np.maximum.accumulate(equity, axis=1), capital)
+    max_dd = ((peak - equity) / peak).max(axis=1) * 100
+    ruined = equity.min(axis=1) <= capital * (1 - ruin_pct / 100)
+    final_return = (equity[:, -1] - capital) / capital * 100
+    return final_return, max_dd, ruined
+
+# trades: DataFrame with pnl_pct and (optionally) confidence, as written by
+# backtest.py. Every trade is sized with the live pos_size rule, so max_pct
+# and threshold are the MAX_POSITION_PCT / CONF_THRESHOLD being evaluated.
+def run(trades, paths=100_000, block=1, capital=sizing.TOTAL_CAPITAL_EUR,
+        max_pct=sizing.MAX_POSITION_PCT, threshold=sizing.CONF_THRESHOLD,
+        ruin_pct=50.0, seed=None, workers=1, dd_limit_pct=20.0):
+    pnl_pct = trades["pnl_pct"].to_numpy(dtype=float)
+    if not len(pnl_pct):
+        return None
+    conf = trades["confidence"].to_numpy(dtype=float) if "confidence" in trades else np.full(len(pnl_pct), 100.0)
+    pnl_eur = sizing.pos_sizes(conf, capital, max_pct, threshold) * pnl_pct / 100
+
+    chunk_paths = max(1, CHUNK_CELLS // len(pnl_pct))
+    chunks = [chunk_paths] * (paths // chunk_paths)
+    if paths % chunk_paths:
+        chunks.append(paths % chunk_paths)
+    seeds = np.random.SeedSequence(seed).spawn(len(chunks))
+    args = [(pnl_eur, n, block, s, capital, ruin_pct) for n, s in zip(chunks, seeds)]
+    if workers > 1 and len(chunks) > 1:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            parts = list(pool.map(simulate_chunk, *zip(*args)))
+    else:
+        parts = [simulate_chunk(*a) for a in args]
+    final_return = np.concatenate([p[0] for p in parts])
+    max_dd = np.concatenate([p[1] for p in parts])
+    ruined = np.concatenate([p[2] for p in parts])
+    return summarize(final_return, max_dd, ruined, dd_limit_pct)
+
+def summarize(final_return, max_dd, ruined, dd_limit_pct=20.0):
+    p5 = np.percentile(final_return, 5)
+    tail = final_return[final_return <= p5]
+    p95_dd = np.percentile(max_dd, 95)
+    median = np.median(final_return)
+    risk_of_ruin = ruined.mean()
+    prob_dd_limit = (max_dd >= dd_limit_pct).mean()
+    return {
+        "paths": len(final_return),
+        "mean_return_pct": final_return.mean(),
+        "median_return_pct": median,
+        "p5_return_pct": p5,
+        "var95_pct": -p5,
+        "cvar95_pct": -tail.mean(),
+        "median_drawdown_pct": np.median(max_dd),
+        "p95_drawdown_pct": p95_dd,
+        "prob_loss": (final_return < 0).mean(),
+        "risk_of_ruin": risk_of_ruin,
+        "prob_dd_limit": prob_dd_limit,
+        # median outcome per unit of bad-case drawdown, less the odds of ruin
+        # and of breaching the drawdown limit. The ratio alone does not change
+        # with position size; the breach odds grow with it. Subtracted rather
+        # than multiplied so a losing set is not helped by more risk.
+        "score": median / max(p95_dd, MIN_SCORE_DD_PCT) - risk_of_ruin - prob_dd_limit,
+    }
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Bootstrap a backtest trade log into outcome distributions.")
+    parser.add_argument("trades", nargs="?", default="backtest_results.csv")
+    parser.add_argument("--paths", type=int, default=100_000)
+    parser.add_argument("--block", type=int, default=1, help="block length (1 = iid bootstrap)")
+    parser.add_argument("--capital", type=float, default=sizing.TOTAL_CAPITAL_EUR)
+    parser.add_argument("--max-pct", type=float, default=sizing.MAX_POSITION_PCT)
+    parser.add_argument("--threshold", type=float, default=sizing.CONF_THRESHOLD)
+    parser.add_argument("--ruin-pct", type=float, default=50.0, help="drawdown from capital counted as ruin")
+    parser.add_argument("--dd-limit-pct", type=float, default=20.0,
+                        help="max drawdown whose breach odds discount the score")
+    parser.add_argument("--workers", type=int, default=1)
+    parser.add_argument("--seed", type=int, default=None)
+    args = parser.parse_args()
+
+    df = pd.read_csv(args.trades)
+    stats = run(df, args.paths, args.block, args.capital, args.max_pct, args.threshold,
+                args.ruin_pct, args.seed, args.workers, args.dd_limit_pct)
+    if stats is None:
+        print("No trades in the log.")
+    else:
+        for k, v in stats.items():
+            print(f"{k:>20}: {v:,.4f}" if isinstance(v, float) else f"{k:>20}: {v:,}")
@@ -0,0 +1,191 @@
+import hashlib
+import json
+import sqlite3
+import threading
+import time
+from datetime import datetime
+import metrics
+
+MAX_ATTEMPTS = 5
+RETRY_BACKOFF_SEC = 5
+# broker order states after which an order will not fill any further
+FINAL_ORDER_STATES = {"filled", "canceled", "expired", "rejected", "replaced"}
+
+def init_outbox(db):
+    db.execute("""
+    CREATE TABLE IF NOT EXISTS outbox (
+        id TEXT PRIMARY KEY,
+        event_id TEXT,
+        kind TEXT,
+        payload TEXT,
+        status TEXT DEFAULT 'pending',
+        attempts INTEGER DEFAULT 0,
+        next_try REAL DEFAULT 0,
+        result TEXT,
+        created TEXT,
+        updated TEXT
+    )
+    """)
+    db.execute("CREATE INDEX IF NOT EXISTS outbox_pending ON outbox (status, next_try)")
+    # final broker state of a submitted order, filled in by reconcile()
+    cols = [r[1] for r in db.execute("PRAGMA table_info(outbox)")]
+    if "fill" not in cols:
+        db.execute("ALTER TABLE outbox ADD COLUMN fill TEXT")
+    db.commit()
+
+# Deterministic per (event, asset), so a replayed order reuses the same
+# client_order_id and the broker can recognise it.
+def client_order_id(event_id, symbol):
+    return "et-" + hashlib.sha256(f"{event_id}:{symbol}".encode()).hexdigest()[:32]
+
+# Journal the decisions for one event. Does not commit: call inside the same
+# transaction that records the event, so both land or neither does.
+def enqueue(db, event_id, orders, alert):
+    now = datetime.utcnow().isoformat()
+    for order in orders:
+        db.execute(
+            "INSERT OR IGNORE INTO outbox (id, event_id, kind, payload, created, updated) VALUES (?, ?, 'order', ?, ?, ?)",
+            (client_order_id(event_id, order["symbol"]), event_id, json.dumps(order), now, now)
+        )
+    db.execute(
+        "INSERT OR IGNORE INTO outbox (id, event_id, kind, payload, created, updated) VALUES (?, ?, 'alert', ?, ?, ?)",
+        (f"alert-{event_id}", event_id, json.dumps(alert), now, now)
+    )
+
+def update(db, row_id, status, attempts, result=None, next_try=0):
+    db.execute(
+        "UPDATE outbox SET status=?, attempts=?, result=?, next_try=?, updated=? WHERE id=?",
+        (status, attempts, json.dumps(result) if result is not None else None, next_try,
+         datetime.utcnow().isoformat(), row_id)
+    )
+    db.commit()
+
+def compose_alert(db, event_id, alert):
+    results = {}
+    for payload, status, result in db.execute(
+        "SELECT payload, status, result FROM outbox WHERE event_id=? AND kind='order'", (event_id,)
+    ):
+        ok = status == "done" and json.loads(result or "{}").get("ok")
+        results[json.loads(payload)["symbol"]] = ok
+    msg = alert["text"]
+    for asset in alert.get("assets", []):
+        msg += f"\n*Asset:* `{asset}`"
+        if asset in results:
+            msg += f"\nExec: {'✅' if results[asset] else '❌'}"
+    for asset in alert.get("rejected", []):
+        msg += f"\n*Unknown ticker:* `{asset}`"
+    return msg
+
+# Process due rows oldest first. Orders go to execute(symbol, direction,
+# size_eur, client_order_id=...); an event's alert is sent once none of its
+# orders are still pending, with their results. Exceptions are retried with
+# backoff, and an order that runs out of attempts is reported through notify;
+# a broker refusal (execute returns False) is final.
+def drain(db, execute, notify):
+    done = 0
+    rows = db.execute(
+        "SELECT id, event_id, kind, payload, attempts FROM outbox "
+        "WHERE status='pending' AND next_try <= ? ORDER BY rowid",
+        (time.time(),)
+    ).fetchall()
+    for row_id, event_id, kind, payload, attempts in rows:
+        payload = json.loads(payload)
+        try:
+            if kind == "order":
+                ok, oid = execute(
+                    payload["symbol"], payload["direction"], payload["size_eur"], client_order_id=row_id
+                )
+                update(db, row_id, "done" if ok else "failed", attempts + 1, {"ok": ok, "order_id": oid})
+            else:
+                waiting = db.execute(
+                    "SELECT 1 FROM outbox WHERE event_id=? AND kind='order' AND status='pending'", (event_id,)
+                ).fetchone()
+                if waiting:
+                    continue
+                notify(compose_alert(db, event_id, payload))
+                update(db, row_id, "done", attempts + 1)
+            done += 1
+        except Exception as e:
+            attempts += 1
+            if attempts >= MAX_ATTEMPTS:
+                print(f"Outbox {kind} {row_id} failed: {e}")
+                update(db, row_id, "failed", attempts, {"error": str(e)})
+                if kind == "order":
+                    try:
+                        notify(f"Order error ({payload['symbol']}): {e}")
+                    except Exception as ne:
+                        print(f"Notify error: {ne}")
+            else:
+                update(db, row_id, "pending", attempts, {"error": str(e)},
+                       time.time() + RETRY_BACKOFF_SEC * 2 ** (attempts - 1))
+    return done
+
+# Follows submitted orders until the broker reports a final state, so fills
+# are counted when they happen rather than when the order is accepted.
+def reconcile(db, order_status, broker="alpaca"):
+    filled = 0
+    rows = db.execute(
+        "SELECT id, result FROM outbox WHERE kind='order' AND status='done' AND fill IS NULL"
+    ).fetchall()
+    for row_id, result in rows:
+        order_id = json.loads(result or "{}").get("order_id")
+        try:
+            state = order_status(order_id) if order_id else "unknown"
+        except Exception as e:
+            print(f"Order status error ({order_id}): {e}")
+            continue
+        if state not in FINAL_ORDER_STATES and state != "unknown":
+            continue
+        db.execute("UPDATE outbox SET fill=?, updated=? WHERE id=?",
+                   (state, datetime.utcnow().isoformat(), row_id))
+        db.commit()
+        if state == "filled":
+            metrics.FILLS.inc(broker=broker)
+            filled += 1
+    return filled
+
+def pending(db):
+    return db.execute("SELECT COUNT(*) FROM outbox WHERE status='pending'").fetchone()[0]
+
+# Background drainer with its own connection. Whatever was left pending by a
+# crash is replayed as soon as it starts. With order_status(order_id) ->
+# broker state, submitted orders are also reconciled every fill_every seconds.
+class Executor:
+    def __init__(self, db_path, execute, notify, poll_sec=5, order_status=None, fill_every=30):
+        self.db_path = db_path
+        self.execute = execute
+        self.notify = notify
+        self.poll_sec = poll_sec
+        self.order_status = order_status
+        self.fill_every = fill_every
+        self.wake_event = threading.Event()
+        self.stop_event = threading.Event()
+        self.thread = threading.Thread(target=self.run, daemon=True, name="outbox")
+
+    def start(self):
+        self.thread.start()
+        return self
+
+    def wake(self):
+        self.wake_event.set()
+
+    def stop(self):
+        self.stop_event.set()
+        self.wake_event.set()
+        self.thread.join()
+
+    def run(self):
+        db = sqlite3.connect(self.db_path, timeout=30)
+        last_reconcile = 0.0
+        while not self.stop_event.is_set():
+            self.wake_event.clear()
+            try:
+                while drain(db, self.execute, self.notify):
+                    pass
+                if self.order_status and time.monotonic() - last_reconcile >= self.fill_every:
+                    last_reconcile = time.monotonic()
+                    reconcile(db, self.order_status)
+            except Exception as e:
+                print(f"Outbox error: {e}")
+            self.wake_event.wait(self.poll_sec)
+        db.close()
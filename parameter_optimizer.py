@@ -1,66 +1,72 @@
+import argparse
 import pandas as pd
-import numpy as np
-import yfinance as yf
-import json
+import backtest
+import monte_carlo
 
-# Load your saved event signals
-df = pd.read_csv("headlines.csv")
+# The grid runs under the main guard: monte_carlo workers re-import this
+# module under the spawn/forkserver start methods.
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Grid search over event-aligned intraday backtests.")
+    parser.add_argument("--events", default="headlines.csv",
+                        help="headlines.csv or an archive.py directory")
+    parser.add_argument("--start", default=None, help="archive only: first date, YYYY-MM-DD")
+    parser.add_argument("--end", default=None, help="archive only: last date, YYYY-MM-DD")
+    parser.add_argument("--interval", default="1m")
+    parser.add_argument("--entry-delay", type=int, default=backtest.entry_delay_sec)
+    parser.add_argument("--slippage-bps", type=float, default=backtest.slippage_bps)
+    parser.add_argument("--fetch", action="store_true", help="download missing bars with yfinance")
+    parser.add_argument("--monte-carlo", action="store_true",
+                        help="rank by bootstrapped risk-adjusted score instead of avg_pnl")
+    parser.add_argument("--paths", type=int, default=20_000, help="Monte Carlo paths per parameter set")
+    parser.add_argument("--block", type=int, default=1, help="Monte Carlo block length (1 = iid)")
+    parser.add_argument("--workers", type=int, default=1)
+    parser.add_argument("--min-trades", type=int, default=20,
+                        help="parameter sets with fewer trades are not Monte Carlo scored or ranked")
+    parser.add_argument("--seed", type=int, default=0,
+                        help="Monte Carlo seed shared by every parameter set, so they see the same draws")
+    args = parser.parse_args()
 
-# Define parameter ranges
-conf_thresholds = [60, 70, 80]
-position_sizes = [0.02, 0.05, 0.1]
-stop_losses = [-2.0, -5.0, -10.0]
-take_profits = [2.0, 5.0, 10.0]
+    # Load your saved event signals
+    df = backtest.load_events(args.events, args.start, args.end)
 
-results = []
+    # Entries are aligned to each event's timestamp once; only exits vary per grid point
+    entries, bars = backtest.align_events(df, args.interval, args.entry_delay, args.fetch)
 
-for conf in conf_thresholds:
-    for pos_size in position_sizes:
-        for sl in stop_losses:
-            for tp in take_profits:
-                pnl_total = 0
-                trades_taken = 0
-                for _, row in df.iterrows():
-                    if row["confidence"] < conf:
-                        continue
-                    try:
-                        assets = json.loads(row["assets"])
-                    except:
-                        continue
-                    for asset in assets:
-                        try:
-                            data = yf.Ticker(asset).history(period="5d")
-                            entry = data["Close"].iloc[0]
-                            exit_price = data["Close"].iloc[-1]
-                            change_pct = (exit_price - entry) / entry * 100
-                            if row["direction"] == "short":
-                                change_pct = -change_pct
-                            if change_pct <= sl:
-                                final_exit = entry * (1 + sl/100)
-                                pnl = sl
-                            elif change_pct >= tp:
-                                final_exit = entry * (1 + tp/100)
-                                pnl = tp
-                            else:
-                                pnl = change_pct
-                            pnl_total += pnl
-                            trades_taken += 1
-                        except Exception as e:
-                            continue
-                avg_pnl = pnl_total / trades_taken if trades_taken > 0 else 0
-                results.append({
-                    "conf": conf,
-                    "pos_size": pos_size,
-                    "stop_loss": sl,
-                    "take_profit": tp,
-                    "trades": trades_taken,
-                    "avg_pnl": avg_pnl
-                })
+    # Define parameter ranges
+    conf_thresholds = [60, 70, 80]
+    position_sizes = [0.02, 0.05, 0.1]
+    stop_losses = [-2.0, -5.0, -10.0]
+    take_profits = [2.0, 5.0, 10.0]
 
-# Convert to DataFrame
-opt = pd.DataFrame(results)
-print(opt.sort_values(by="avg_pnl", ascending=False))
+    results = []
 
-# Save to CSV
-opt.to_csv("parameter_optimization_results.csv", index=False)
-print("✅ Optimization results saved to parameter_optimization_results.csv")
+    for sl in stop_losses:
+        for tp in take_profits:
+            trades = backtest.intraday_trades(entries, bars, sl, tp, slippage=args.slippage_bps)
+            for conf in conf_thresholds:
+                taken = trades[trades["confidence"] >= conf] if not trades.empty else trades
+                trades_taken = len(taken)
+                avg_pnl = taken["pnl_pct"].mean() if trades_taken > 0 else 0
+                for pos_size in position_sizes:
+                    row = {
+                        "conf": conf,
+                        "pos_size": pos_size,
+                        "stop_loss": sl,
+                        "take_profit": tp,
+                        "trades": trades_taken,
+                        "avg_pnl": avg_pnl
+                    }
+                    if args.monte_carlo and trades_taken >= args.min_trades:
+                        stats = monte_carlo.run(taken, args.paths, args.block, max_pct=pos_size,
+                                                threshold=conf, seed=args.seed, workers=args.workers)
+                        row.update({f"mc_{k}": v for k, v in stats.items() if k != "paths"})
+                    results.append(row)
+
+    # Convert to DataFrame
+    opt = pd.DataFrame(results)
+    rank_by = "mc_score" if args.monte_carlo and "mc_score" in opt else "avg_pnl"
+    print(opt.sort_values(by=rank_by, ascending=False))
+
+    # Save to CSV
+    opt.to_csv("parameter_optimization_results.csv", index=False)
+    print("✅ Optimization results saved to parameter_optimization_results.csv")
@@ -0,0 +1,241 @@
+import argparse
+import json
+import sqlite3
+import time
+import uuid
+import pandas as pd
+import event_trader
+import bar_store
+import metrics
+
+# Replays historical headlines through event_trader.handle() -- the same
+# classify -> mark -> trade -> alert path the live bot runs -- against a
+# simulated broker that fills from the local bar store.
+
+def load_headlines_csv(path):
+    df = pd.read_csv(path)
+    for _, row in df.iterrows():
+        yield {
+            "timestamp": row["timestamp"],
+            "headline": row["headline"],
+            "summary": row["summary"] if isinstance(row["summary"], str) else "",
+            "event": {
+                "assets_affected": json.loads(row["assets"]),
+                "direction": row["direction"],
+                "confidence": int(row["confidence"]),
+                "reason": row["reason"],
+                "event_type": row.get("category", "other"),
+            },
+        }
+
+def load_events_db(path):
+    db = sqlite3.connect(path)
+    rows = db.execute("""
+        SELECT headline, summary, confidence, direction, reason, event_type, sentiment, timestamp, raw
+        FROM events WHERE headline IS NOT NULL
+    """).fetchall()
+    db.close()
+    for headline, summary, conf, direction, reason, event_type, sentiment, ts, raw in rows:
+        # assets only exist in the raw LLM output; older rows without it never trade
+        assets = json.loads(raw).get("assets_affected", []) if raw else []
+        yield {
+            "timestamp": ts,
+            "headline": headline,
+            "summary": summary or "",
+            "event": {
+                "assets_affected": assets,
+                "direction": direction,
+                "confidence": conf or 0,
+                "reason": reason or "",
+                "event_type": event_type or "other",
+                "sentiment": sentiment or "neutral",
+            },
+        }
+
+def load_archive(path):
+    # recorded feed archive: one JSON object per line
+    with open(path) as f:
+        for line in f:
+            line = line.strip()
+            if not line:
+                continue
+            item = json.loads(line)
+            yield {
+                "timestamp": item.get("published") or item.get("timestamp"),
+                "headline": item.get("title") or item.get("headline", ""),
+                "summary": item.get("summary", ""),
+                "event": item.get("event"),
+            }
+
+def load_source(path):
+    if path.endswith(".csv"):
+        items = load_headlines_csv(path)
+    elif path.endswith(".db"):
+        items = load_events_db(path)
+    else:
+        items = load_archive(path)
+    items = [i for i in items if i["timestamp"] and i["headline"]]
+    for i in items:
+        i["ts"] = bar_store.to_epoch(i["timestamp"])
+    return sorted(items, key=lambda i: i["ts"])
+
+class SimBroker:
+    def __init__(self, db, start, end, interval="1m", slippage_bps=5.0, fetch=False,
+                 horizon=7 * 86400):
+        self.db = db
+        self.start = start
+        self.end = end
+        self.interval = interval
+        self.slippage_bps = slippage_bps
+        self.fetch = fetch
+        self.horizon = horizon
+        # sortable by start time, unique even for runs started in the same second
+        self.run_id = f"{time.strftime('%Y%m%d%H%M%S')}-{uuid.uuid4().hex[:8]}"
+        self.now = None
+        self.bars = {}
+        self.fills = []
+        self.db.execute("""
+        CREATE TABLE IF NOT EXISTS fills (
+            id TEXT PRIMARY KEY,
+            run_id TEXT,
+            symbol TEXT,
+            side TEXT,
+            qty REAL,
+            price REAL,
+            size_eur REAL,
+            event_ts INTEGER,
+            fill_ts INTEGER,
+            timestamp TEXT
+        )
+        """)
+        self.db.commit()
+
+    def series(self, ticker):
+        if ticker not in self.bars:
+            self.bars[ticker] = bar_store.series(
+                ticker, self.start - 86400, self.end + self.horizon,
+                self.interval, fetch=self.fetch
+            )
+        return self.bars[ticker]
+
+    # same signature and return shape as event_trader.place_trade
+    def place_trade(self, ticker, direction, size_eur, client_order_id=None):
+        bars = self.series(ticker)
+        i = bars.index_at(self.now)
+        if i >= len(bars):
+            return False, None
+        side = "sell" if direction == "short" else "buy"
+        slip = self.slippage_bps / 10_000
+        price = bars.open[i] * (1 + slip if side == "buy" else 1 - slip)
+        qty = int(size_eur * event_trader.EURUSD_FX_RATE // price)
+        if qty <= 0:
+            return False, None
+        oid = f"sim-{self.run_id}-{client_order_id or len(self.fills) + 1}"
+        fill = {
+            "id": oid, "run_id": self.run_id, "symbol": ticker, "side": side, "qty": qty, "price": price,
+            "size_eur": size_eur, "event_ts": self.now, "fill_ts": int(bars.ts[i]),
+        }
+        self.fills.append(fill)
+        metrics.FILLS.inc(broker="sim")
+        self.db.execute(
+            "INSERT OR REPLACE INTO fills VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+            (*fill.values(), pd.Timestamp(fill["fill_ts"], unit="s", tz="UTC").isoformat())
+        )
+        self.db.commit()
+        return True, oid
+
+    def mark_to_market(self, end_ts):
+        rows = []
+        for f in self.fills:
+            bars = self.bars[f["symbol"]]
+            j = bars.last_index_before(min(end_ts, f["fill_ts"] + self.horizon))
+            exit_price = bars.close[j] if j >= 0 else f["price"]
+            pnl_pct = (exit_price - f["price"]) / f["price"] * 100
+            if f["side"] == "sell":
+                pnl_pct = -pnl_pct
+            rows.append({**f, "exit_price": exit_price, "pnl_pct": pnl_pct,
+                         "pnl_usd": f["qty"] * f["price"] * pnl_pct / 100})
+        return pd.DataFrame(rows)
+
+def run(path, speed=0.0, live_llm=False, db_path="replay.db", interval="1m",
+        slippage_bps=5.0, fetch=False, verbose=False):
+    items = load_source(path)
+    if not items:
+        print("Nothing to replay.")
+        return None
+
+    # point the pipeline at a scratch db so replays never touch events.db;
+    # fills accumulate across runs, tagged with run_id
+    db = event_trader.init_db(db_path)
+    db.execute("DELETE FROM events")
+    db.execute("DELETE FROM outbox")
+    db.commit()
+    live_db = event_trader.DB
+    event_trader.DB = db
+
+    broker = SimBroker(db, items[0]["ts"], items[-1]["ts"], interval, slippage_bps, fetch)
+    alerts = []
+    recorded = {}
+    cls_time = 0.0
+
+    def classifier(title, summary):
+        nonlocal cls_time
+        t0 = time.perf_counter()
+        evt = event_trader.classify(title, summary) if live_llm else recorded.get(title)
+        cls_time += time.perf_counter() - t0
+        return evt
+
+    def notify(msg):
+        alerts.append(msg)
+        if verbose:
+            print(msg)
+
+    signals = 0
+    start = time.perf_counter()
+    prev_ts = items[0]["ts"]
+    try:
+        for item in items:
+            if speed > 0:
+                time.sleep(max(0, item["ts"] - prev_ts) / speed)
+            prev_ts = item["ts"]
+            broker.now = item["ts"]
+            recorded[item["headline"]] = item["event"]
+            if event_trader.handle(
+                item["headline"], item["summary"],
+                classifier=classifier, trader=broker.place_trade, notify=notify,
+                timestamp=pd.Timestamp(item["ts"], unit="s", tz="UTC").isoformat()
+            ):
+                signals += 1
+    finally:
+        event_trader.DB = live_db
+    elapsed = time.perf_counter() - start
+
+    trades = broker.mark_to_market(items[-1]["ts"] + broker.horizon)
+    span_days = (items[-1]["ts"] - items[0]["ts"]) / 86400
+    print(f"\nReplayed {len(items)} headlines spanning {span_days:.1f} days in {elapsed:.2f}s")
+    print(f"Throughput: {len(items) / elapsed if elapsed else float('inf'):.1f} headlines/s "
+          f"(classification {cls_time:.2f}s)")
+    print(f"Signals: {signals}  Fills: {len(broker.fills)}  Alerts: {len(alerts)}")
+    if not trades.empty:
+        print(f"Win rate: {(trades['pnl_pct'] > 0).mean() * 100:.1f}%  "
+              f"Avg PnL: {trades['pnl_pct'].mean():.2f}%  "
+              f"Total: ${trades['pnl_usd'].sum():.2f}")
+        trades.to_csv("replay_results.csv", index=False)
+    return trades
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Replay historical headlines through the live pipeline.")
+    parser.add_argument("source", nargs="?", default="headlines.csv",
+                        help="headlines.csv, events.db or a .jsonl feed archive")
+    parser.add_argument("--speed", type=float, default=0.0,
+                        help="multiple of wall-clock time (0 = as fast as possible)")
+    parser.add_argument("--live-llm", action="store_true",
+                        help="re-classify with GPT/Gemini instead of the recorded classification")
+    parser.add_argument("--db", default="replay.db")
+    parser.add_argument("--interval", default="1m")
+    parser.add_argument("--slippage-bps", type=float, default=5.0)
+    parser.add_argument("--fetch", action="store_true", help="download missing bars with yfinance")
+    parser.add_argument("--verbose", action="store_true")
+    args = parser.parse_args()
+    run(args.source, args.speed, args.live_llm, args.db, args.interval,
+        args.slippage_bps, args.fetch, args.verbose)
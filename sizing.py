@@ -0,0 +1,17 @@
+import numpy as np
+
+# Position sizing shared by the live bot and the risk tools, so backtests size
+# trades exactly as event_trader does without importing its API clients.
+TOTAL_CAPITAL_EUR = 1000
+MAX_POSITION_PCT = 0.05
+CONF_THRESHOLD = 80
+
+def pos_size(conf, capital=TOTAL_CAPITAL_EUR, max_pct=MAX_POSITION_PCT, threshold=CONF_THRESHOLD):
+    w = (conf - threshold) / (100 - threshold)
+    w = max(0, min(1, w))
+    return round(capital * max_pct * (0.6 + 0.4 * w), 2)
+
+# vectorized pos_size over an array of confidences
+def pos_sizes(conf, capital=TOTAL_CAPITAL_EUR, max_pct=MAX_POSITION_PCT, threshold=CONF_THRESHOLD):
+    w = np.clip((np.asarray(conf, dtype=float) - threshold) / (100 - threshold), 0, 1)
+    return np.round(capital * max_pct * (0.6 + 0.4 * w), 2)
@@ -0,0 +1,324 @@
+import json
+import os
+import re
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from datetime import datetime, timezone
+import feed_reader
+import metrics
+
+# Source plugins. Each kind registers itself under the "type" used in
+# feeds.json; adding a feed or API is a config change, not a code change.
+#
+# feeds.json entries are either a plain URL (an RSS/Atom feed) or an object:
+#   {"type": "json", "name": "polygon", "url": ..., "params": {...}, ...}
+# "${VAR}" in a url or param is read from the environment; a source whose
+# variables are unset is skipped. Every source accepts "min_interval"
+# (seconds between polls), "timeout", "max_age" (seconds) and "group"
+# ("news" by default; trader_feeds.py reads the "trader" group).
+
+REGISTRY = {}
+
+DEFAULT_ACCOUNTS = [
+    "Bloomberg", "Reuters", "howardlindzon", "RampCapitalLLC",
+    "charliebilello", "sentimenttrader", "KobeissiLetter",
+    "KailashConcepts", "hhhypergrowth", "FinancialJuice",
+    "AlmanackReport", "TheTranscript_"
+]
+
+ENV_RE = re.compile(r"\$\{(\w+)\}")
+
+def register(kind):
+    def wrap(cls):
+        cls.kind = kind
+        REGISTRY[kind] = cls
+        return cls
+    return wrap
+
+def expand(value):
+    # -> (value with ${VAR} substituted, names of unset variables)
+    if isinstance(value, dict):
+        out, missing = {}, []
+        for k, v in value.items():
+            out[k], m = expand(v)
+            missing += m
+        return out, missing
+    if not isinstance(value, str):
+        return value, []
+    missing = [v for v in ENV_RE.findall(value) if not os.getenv(v)]
+    return ENV_RE.sub(lambda m: os.getenv(m.group(1), ""), value), missing
+
+def to_epoch(value):
+    if value in (None, ""):
+        return None
+    if isinstance(value, (int, float)):
+        return float(value)
+    return feed_reader.parse_time(str(value))
+
+def dig(obj, path):
+    # "data.items" -> obj["data"]["items"]; "" -> obj
+    for key in filter(None, (path or "").split(".")):
+        if not isinstance(obj, dict):
+            return None
+        obj = obj.get(key)
+    return obj
+
+RateLimited = feed_reader.RateLimited
+
+class Source:
+    kind = None
+
+    def __init__(self, name, min_interval=0, timeout=10, max_age=3600, group="news", **options):
+        self.name = name
+        self.group = group
+        self.min_interval = min_interval
+        self.timeout = timeout
+        self.max_age = max_age
+        self.options = options
+        self.missing = []
+        self.last_poll = None
+        self.blocked_until = 0.0
+
+    # cursor key in the feed_cursors table
+    @property
+    def key(self):
+        return f"{self.kind}:{self.name}"
+
+    def due(self):
+        now = time.monotonic()
+        if self.missing or now < self.blocked_until:
+            return False
+        return self.last_poll is None or now - self.last_poll >= self.min_interval
+
+    def get(self, url, **kwargs):
+        try:
+            resp = feed_reader.SESSION.get(url, timeout=self.timeout, **kwargs)
+            if resp.status_code == 429:
+                raise RateLimited(feed_reader.retry_after(resp))
+            resp.raise_for_status()
+        except Exception as e:
+            metrics.FEEDS_FETCHED.inc(status="rate_limited" if isinstance(e, RateLimited) else "error")
+            raise
+        metrics.FEEDS_FETCHED.inc(status="ok")
+        # bytes off the wire, as feed_reader.read counts them
+        metrics.FEED_BYTES.inc(resp.raw.tell())
+        return resp
+
+    # -> (items, new cursor). Runs on a worker thread; must not touch the db.
+    # Items are dicts with title, summary, link, published (epoch or None).
+    def poll(self, cursor):
+        raise NotImplementedError
+
+@register("rss")
+class RSSSource(Source):
+    def __init__(self, url, name=None, **kwargs):
+        super().__init__(name or url, **kwargs)
+        self.url = url
+
+    @property
+    def key(self):
+        return self.url  # cursor rows from before sources.py were keyed by url
+
+    def poll(self, cursor):
+        return feed_reader.read(self.url, cursor, self.max_age, self.timeout)
+
+# Generic JSON REST source. Options:
+#   params       query parameters
+#   items        dotted path to the list of articles ("" if the body is the list)
+#   fields       {"title": ..., "summary": ..., "link": ..., "published": ..., "id": ...}
+#   cursor_param query parameter that takes the newest value already seen
+#   cursor_field "published" (sent as ISO 8601) or "id"
+#   next         dotted path to the next-page URL; max_pages caps pagination
+#   next_params  params to resend with next-page URLs (e.g. the API key)
+@register("json")
+class JSONSource(Source):
+    def __init__(self, name, url, params=None, items="", fields=None, cursor_param=None,
+                 cursor_field="published", next=None, next_params=(), max_pages=1, **kwargs):
+        super().__init__(name, **kwargs)
+        self.url, m1 = expand(url)
+        self.params, m2 = expand(params or {})
+        self.missing = m1 + m2
+        self.items = items
+        self.fields = {"title": "title", "summary": "summary", "link": "url",
+                       "published": "published", "id": "id", **(fields or {})}
+        self.cursor_param = cursor_param
+        self.cursor_field = cursor_field
+        self.next = next
+        self.next_params = {k: self.params[k] for k in next_params if k in self.params}
+        self.max_pages = max_pages
+
+    def cursor_value(self, cursor):
+        if self.cursor_field == "id":
+            return cursor.get("guid")
+        if cursor.get("published"):
+            return datetime.fromtimestamp(cursor["published"], timezone.utc).strftime("%Y-%m-%dT%H:%M:%SZ")
+        return None
+
+    def poll(self, cursor):
+        params = dict(self.params)
+        since = self.cursor_value(cursor)
+        if self.cursor_param and since:
+            params[self.cursor_param] = since
+        cutoff = time.time() - self.max_age if self.max_age else None
+        f = self.fields
+        found, url, pages = [], self.url, 0
+        while url and pages < self.max_pages:
+            data = self.get(url, params=params).json()
+            pages += 1
+            stop = False
+            for raw in dig(data, self.items) or []:
+                item = {
+                    "title": (raw.get(f["title"]) or "").strip(),
+                    "summary": raw.get(f["summary"]) or "",
+                    "link": raw.get(f["link"]) or "",
+                    "published": to_epoch(raw.get(f["published"])),
+                    "guid": str(raw.get(f["id"]) or raw.get(f["link"]) or ""),
+                }
+                if not item["title"]:
+                    continue
+                if (cursor.get("guid") and item["guid"] == cursor["guid"]) or (
+                    item["published"] is not None and (
+                        (cutoff and item["published"] < cutoff)
+                        or (cursor.get("published") and item["published"] <= cursor["published"])
+                    )
+                ):
+                    stop = True
+                    continue
+                found.append(item)
+            url = dig(data, self.next) if self.next and not stop else None
+            params = self.next_params
+        new_cursor = dict(cursor)
+        if found:
+            newest = max(found, key=lambda i: i["published"] or 0)
+            new_cursor["guid"] = newest["guid"]
+            if newest["published"] is not None:
+                new_cursor["published"] = newest["published"]
+        return found, new_cursor
+
+# Posts from whitelisted accounts via the X/Twitter v2 recent-search API.
+# Accounts are packed into as few "from:a OR from:b" queries as fit the
+# query length limit; since_id is the cursor.
+@register("social")
+class SocialSource(Source):
+    SEARCH_URL = "https://api.twitter.com/2/tweets/search/recent"
+    MAX_QUERY = 512
+
+    def __init__(self, name="twitter", accounts=None, accounts_file=None,
+                 token="${TWITTER_BEARER_TOKEN}", **kwargs):
+        kwargs.setdefault("min_interval", 300)
+        super().__init__(name, **kwargs)
+        if accounts is None:
+            accounts = load_accounts(accounts_file) if accounts_file else DEFAULT_ACCOUNTS
+        self.accounts = accounts
+        self.token, self.missing = expand(token)
+
+    def queries(self):
+        suffix = " -is:retweet"
+        batch = []
+        for account in self.accounts:
+            q = " OR ".join(f"from:{a}" for a in batch + [account])
+            if batch and len(f"({q}){suffix}") > self.MAX_QUERY:
+                yield "(" + " OR ".join(f"from:{a}" for a in batch) + ")" + suffix
+                batch = []
+            batch.append(account)
+        if batch:
+            yield "(" + " OR ".join(f"from:{a}" for a in batch) + ")" + suffix
+
+    def poll(self, cursor):
+        headers = {"Authorization": f"Bearer {self.token}"}
+        found = []
+        newest = cursor.get("guid")
+        for query in self.queries():
+            params = {
+                "query": query, "max_results": 100,
+                "tweet.fields": "created_at,author_id",
+                "expansions": "author_id", "user.fields": "username",
+            }
+            if cursor.get("guid"):
+                params["since_id"] = cursor["guid"]
+            data = self.get(self.SEARCH_URL, params=params, headers=headers).json()
+            users = {u["id"]: u["username"] for u in dig(data, "includes.users") or []}
+            for tweet in data.get("data", []):
+                handle = users.get(tweet.get("author_id"), "unknown")
+                found.append({
+                    "title": f"{handle}: {tweet['text']}",
+                    "summary": "",
+                    "link": f"https://x.com/{handle}/status/{tweet['id']}",
+                    "published": to_epoch(tweet.get("created_at")),
+                    "guid": tweet["id"],
+                })
+                if newest is None or int(tweet["id"]) > int(newest):
+                    newest = tweet["id"]
+        return found, {**cursor, "guid": newest}
+
+def load_accounts(path="whitelisted_accounts.json"):
+    try:
+        with open(path) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return DEFAULT_ACCOUNTS
+
+def build(entry, **defaults):
+    if isinstance(entry, str):
+        return RSSSource(entry, **defaults)
+    entry = {**defaults, **entry}
+    kind = entry.pop("type", "rss")
+    return REGISTRY[kind](**entry)
+
+def load_sources(feeds_path="feeds.json", accounts_path="whitelisted_accounts.json", group="news", **defaults):
+    with open(feeds_path) as f:
+        entries = json.load(f)
+    sources = [s for s in (build(e, **defaults) for e in entries) if s.group == group]
+    if accounts_path and not any(s.kind == "social" for s in sources):
+        sources.append(SocialSource(accounts=load_accounts(accounts_path), **defaults))
+    return sources
+
+# Polls every due source concurrently and yields one normalized, deduped
+# stream of items ({"uid", "title", "summary", "link", "published", "source",
+# "kind"}). Cursors are read and written here on the calling thread, so the
+# workers never share the sqlite connection; a source's cursor advances only
+# after all of its items were consumed. db=None polls without cursors.
+# Each consumer keeps its own cursors ("<consumer>:<key>"), so two bots
+# sharing events.db do not advance each other past unread items; the trading
+# bot uses the bare keys.
+def poll_all(sources, db=None, seen=None, workers=16, consumer=None):
+    due = [s for s in sources if s.due()]
+    if not due:
+        return
+    keys = {s: f"{consumer}:{s.key}" if consumer else s.key for s in due}
+    cursors = {s: feed_reader.get_cursor(db, keys[s]) if db else {} for s in due}
+    emitted = set()
+    with ThreadPoolExecutor(max_workers=min(workers, len(due))) as pool:
+        futures = {pool.submit(s.poll, cursors[s]): s for s in due}
+        for future in as_completed(futures):
+            source = futures[future]
+            source.last_poll = time.monotonic()
+            try:
+                items, cursor = future.result()
+            except RateLimited as e:
+                source.blocked_until = time.monotonic() + e.retry_after
+                print(f"{source.name} rate limited, backing off {e.retry_after:.0f}s")
+                continue
+            except Exception as e:
+                print(f"Source error ({source.name}): {e}")
+                continue
+            for item in items:
+                item_uid = feed_reader.content_hash(item["title"])
+                if item_uid in emitted or (seen is not None and seen(item_uid)):
+                    metrics.HEADLINES_DEDUPED.inc()
+                    continue
+                emitted.add(item_uid)
+                metrics.HEADLINES_SEEN.inc(source=source.kind)
+                yield {
+                    "uid": item_uid,
+                    "title": item["title"],
+                    "summary": item.get("summary", ""),
+                    "link": item.get("link", ""),
+                    "published": item.get("published"),
+                    "source": source.name,
+                    "kind": source.kind,
+                }
+            # only once the consumer has handled every item from this source,
+            # so a crash mid-cycle re-reads them on restart
+            if db:
+                feed_reader.save_cursor(db, keys[source], cursor)
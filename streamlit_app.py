@@ -7,6 +7,7 @@ from datetime import datetime
 import alpaca_trade_api as trade_api
 from dotenv import load_dotenv
 import os
+import archive
 
 st.set_page_config(page_title="EventTrader Dashboard", layout="wide")
 st.title("📊 EventTrader Dashboard")
@@ -116,6 +117,26 @@ if sector_counts:
     st.write("**Approved Trades by Sector/Event Type**")
     st.json(sector_counts)
 
+# ============================
+# EVENT ARCHIVE
+# ============================
+
+st.subheader("🗄️ Event Archive")
+
+if os.path.isdir(os.path.join(archive.ARCHIVE_DIR, "events")):
+    try:
+        archived = archive.scan("events", columns=["date", "event_type", "confidence"])
+        by_type = archived.group_by("event_type").aggregate([
+            ("confidence", "count"),
+            ("confidence", "mean"),
+        ]).to_pandas()
+        st.write(f"**Archived events**: {archived.num_rows}")
+        st.dataframe(by_type)
+    except Exception as e:
+        st.warning(f"Could not read archive: {e}")
+else:
+    st.info("No event archive yet. Run `python archive.py` to build it.")
+
 # ============================
 # OPTIONS SIGNALS MODULE
 # ============================
@@ -0,0 +1,213 @@
+import csv
+import mmap
+import os
+import re
+import time
+
+SYMBOLS_FILE = "symbols.csv"
+# starter aliases; --refresh merges them in when symbols.csv does not exist yet
+EXAMPLE_FILE = "symbols.example.csv"
+
+TOKEN_RE = re.compile(r"[A-Za-z0-9&.'-]+")
+CASHTAG_RE = re.compile(r"\$([A-Za-z][A-Za-z.\-]{0,6})\b")
+# "(NASDAQ: AAPL)", "(NYSE:BA)", "(AAPL.O)"
+PAREN_RE = re.compile(r"\((?:[A-Za-z]+\s*:\s*)?([A-Z][A-Z.\-]{0,6})\)")
+EXCHANGE_RE = re.compile(r"^(?:NASDAQ|NYSE|NYSEARCA|NYSEAMERICAN|AMEX|ARCA|BATS|OTC)\s*:\s*", re.I)
+# Reuters RIC / Bloomberg suffixes: AAPL.O, AAPL.OQ, IBM.N, AAPL US
+# what a bare ticker can look like when there is no symbol master to check
+SHAPE_RE = re.compile(r"^[A-Z][A-Z0-9]{0,5}(?:\.[A-Z]{1,2})?$")
+SUFFIX_RE = re.compile(r"(?:\.(?:O|OQ|N|K|A|P)|\s+US(?:\s+EQUITY)?)$", re.I)
+NAME_SUFFIXES = {
+    "inc", "inc.", "corp", "corp.", "corporation", "co", "co.", "company", "ltd", "ltd.",
+    "plc", "holdings", "group", "sa", "ag", "nv", "n.v.", "se", "common", "stock",
+    "class", "shares", "ordinary", "ads", "etf", "trust", "the",
+}
+
+def words(text):
+    return [w.strip(".'-").lower() for w in TOKEN_RE.findall(text) if w.strip(".'-")]
+
+def clean_name(name):
+    # "Apple Inc. Common Stock" -> "apple"
+    out = words(name)
+    while out and out[-1] in NAME_SUFFIXES:
+        out.pop()
+    if out and out[0] == "the":
+        out.pop(0)
+    return " ".join(out)
+
+# Local symbol master: symbol -> name, plus alias and company-name lookups.
+# Validation is dict lookups; headline extraction walks a word trie built from
+# names and aliases (longest match wins). The backing CSV (symbol,name,aliases
+# with aliases separated by "|") is read through mmap and reloaded when its
+# mtime changes.
+class SymbolIndex:
+    def __init__(self, path=SYMBOLS_FILE, check_every=60):
+        self.path = path
+        self.check_every = check_every
+        self.mtime = None
+        self.checked = 0.0
+        self.symbols = {}
+        self.aliases = {}
+        self.trie = {}
+        self.refresh()
+
+    def __len__(self):
+        return len(self.symbols)
+
+    def __contains__(self, symbol):
+        self.maybe_refresh()
+        return symbol in self.symbols
+
+    def refresh(self):
+        self.checked = time.monotonic()
+        try:
+            mtime = os.stat(self.path).st_mtime
+        except OSError:
+            return False
+        if mtime == self.mtime:
+            return False
+        symbols, aliases, trie = {}, {}, {}
+        with open(self.path, "rb") as f:
+            try:
+                mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+            except ValueError:  # empty file
+                mm = None
+            if mm is not None:
+                with mm:
+                    lines = (line.decode("utf-8") for line in iter(mm.readline, b""))
+                    for row in csv.DictReader(lines):
+                        symbol = (row.get("symbol") or "").strip().upper()
+                        if not symbol:
+                            continue
+                        name = (row.get("name") or "").strip()
+                        symbols[symbol] = name
+                        names = [clean_name(name)] + [
+                            a.strip().lower() for a in (row.get("aliases") or "").split("|")
+                        ]
+                        for alias in names:
+                            if not alias:
+                                continue
+                            aliases.setdefault(alias, symbol)
+                            node = trie
+                            for w in alias.split():
+                                node = node.setdefault(w, {})
+                            node.setdefault("", symbol)
+        self.symbols, self.aliases, self.trie = symbols, aliases, trie
+        self.mtime = mtime
+        return True
+
+    def maybe_refresh(self):
+        if time.monotonic() - self.checked >= self.check_every:
+            self.refresh()
+
+    def normalize(self, raw):
+        self.maybe_refresh()
+        if not raw or not isinstance(raw, str):
+            return None
+        s = EXCHANGE_RE.sub("", raw.strip().lstrip("$")).strip()
+        # the exchange suffix is only stripped on a miss, so share classes
+        # like BRK.A / BF.A still resolve
+        for text in (s, SUFFIX_RE.sub("", s).strip()):
+            candidate = text.upper()
+            if candidate in self.symbols:
+                return candidate
+            # BRK-B / BRK/B / BRK B -> BRK.B
+            dotted = re.sub(r"[-/ ]", ".", candidate)
+            if dotted in self.symbols:
+                return dotted
+        s = SUFFIX_RE.sub("", s).strip()
+        return self.aliases.get(s.lower()) or self.aliases.get(clean_name(s))
+
+    # -> (normalized unique symbols, rejected raw values). With no symbol file
+    # loaded only the form is checked: "$msft" / "NASDAQ: MSFT" / "BRK-B" are
+    # cleaned up, and values that cannot be a ticker are rejected.
+    def validate(self, assets):
+        # a bare "AAPL" would otherwise be iterated as A, A, P, L
+        if isinstance(assets, str):
+            assets = [assets]
+        assets = [a for a in assets or [] if isinstance(a, str)]
+        if not self.symbols:
+            self.maybe_refresh()
+        valid, rejected = [], []
+        for raw in assets:
+            symbol = self.normalize(raw) if self.symbols else shape(raw)
+            if symbol is None:
+                rejected.append(raw)
+            elif symbol not in valid:
+                valid.append(symbol)
+        return valid, rejected
+
+    def extract(self, text):
+        self.maybe_refresh()
+        found = []
+        for m in CASHTAG_RE.finditer(text):
+            symbol = self.normalize(m.group(1))
+            if symbol and symbol not in found:
+                found.append(symbol)
+        for m in PAREN_RE.finditer(text):
+            symbol = self.normalize(m.group(1))
+            if symbol and symbol not in found:
+                found.append(symbol)
+        tokens = words(text)
+        i = 0
+        while i < len(tokens):
+            node, match, j = self.trie, None, i
+            while j < len(tokens) and tokens[j] in node:
+                node = node[tokens[j]]
+                j += 1
+                if "" in node:
+                    match = (node[""], j)
+            if match:
+                if match[0] not in found:
+                    found.append(match[0])
+                i = match[1]
+            else:
+                i += 1
+        return found
+
+def shape(raw):
+    s = EXCHANGE_RE.sub("", raw.strip().lstrip("$")).strip().upper()
+    s = re.sub(r"[-/ ]", ".", s)
+    return s if SHAPE_RE.match(s) else None
+
+def write_symbols(rows, path=SYMBOLS_FILE):
+    tmp = path + ".tmp"
+    with open(tmp, "w", newline="") as f:
+        w = csv.writer(f)
+        w.writerow(["symbol", "name", "aliases"])
+        for symbol, name, aliases in sorted(rows):
+            w.writerow([symbol, name, "|".join(aliases)])
+    os.replace(tmp, path)
+
+if __name__ == "__main__":
+    import argparse
+    parser = argparse.ArgumentParser(description="Inspect or rebuild the local symbol master.")
+    parser.add_argument("--refresh", action="store_true",
+                        help="rebuild symbols.csv from Alpaca's tradable assets, keeping existing aliases")
+    parser.add_argument("--path", default=SYMBOLS_FILE)
+    parser.add_argument("text", nargs="*", help="headline text or tickers to check")
+    args = parser.parse_args()
+
+    if args.refresh:
+        import event_trader
+        if not event_trader.alpaca:
+            raise SystemExit("Alpaca is not configured")
+        existing = {}
+        source = args.path if os.path.exists(args.path) else EXAMPLE_FILE
+        if os.path.exists(source):
+            with open(source, newline="") as f:
+                for row in csv.DictReader(f):
+                    existing[row["symbol"]] = [a for a in (row.get("aliases") or "").split("|") if a]
+        rows = [
+            (a.symbol, a.name, existing.get(a.symbol, []))
+            for a in event_trader.alpaca.list_assets(status="active")
+            if a.tradable
+        ]
+        write_symbols(rows, args.path)
+        print(f"{len(rows)} symbols written to {args.path}")
+
+    index = SymbolIndex(args.path)
+    if args.text:
+        text = " ".join(args.text)
+        print("extract:", index.extract(text))
+        print("validate:", index.validate(args.text))